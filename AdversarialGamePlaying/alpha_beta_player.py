@@ -1,77 +1,235 @@
 from sample_players import DataPlayer
+from move_ordering import MoveOrderer
+from transposition_table import TranspositionTable, EXACT, LOWERBOUND, UPPERBOUND
+from isolation.endgame import solve, endgame_utility
+from time_manager import TimeManager
+import logging
 import random
 
+logger = logging.getLogger(__name__)
+
+TT_CAPACITY = 2**16  # number of slots in the per-turn transposition table
+ASPIRATION_WINDOW = 2  # half-width of the root window around the previous score
+CRITICAL_MOBILITY = 2  # positions where the agent has at most this many moves get more time
+
 class AlphabetaPlayer(DataPlayer):
-    """ Implementation of Alpha–beta pruning adversarial search agent 
+    """ Implementation of Alpha–beta pruning adversarial search agent
     to play knight's Isolation
-    """    
+
+    Set `pvs = True` (see PvsPlayer) to search with principal variation
+    search and aspiration windows instead of plain alpha-beta.
+    """
+    pvs = False
     def get_action(self, state):
-        """ Employ alpha–beta pruning search algorithm to decrease the 
-        number of nodes that are evaluated by the minimax to obtain 
+        """ Employ alpha–beta pruning search algorithm to decrease the
+        number of nodes that are evaluated by the minimax to obtain
         an action (a move) available in the current state.
-        """        
-        if state.ply_count < 2:
+        """
+        book_action = self.probe_book(state)
+        if book_action is not None:
+            self.queue.put(book_action)
+        elif state.ply_count < 2:
             self.queue.put(random.choice(state.actions()))
+        elif self.solve_endgame(state):
+            return
         else:
+            self.reset_search()
+            clock = TimeManager(getattr(self.queue, "remaining", lambda: float("inf")))
             depth=5
+            nodes = 0
+            action = None
             while True:
-              action = self.alphaBeta(state, depth)
+              clock.start_iteration()
+              last_action, action = action, self.alphaBeta(state, depth)
+              clock.finish_iteration(self.nodes)
+              nodes += self.nodes
+              self.telemetry = {"depth": depth, "nodes": nodes, "tt_hit_rate": self.tt.hit_rate,
+                                "value": self.last_score}
               self.queue.put(action)
+              logger.debug("Completed depth {}: {} nodes, {}".format(depth, self.nodes, self.tt))
+              if abs(self.last_score) == float("inf"):
+                  break  # the outcome is proven; deeper searches cannot change it
+              critical = (action != last_action
+                          or len(state.actions()) <= CRITICAL_MOBILITY)
+              if not clock.should_continue(critical):
+                  break
               depth += 1
 
+    def solve_endgame(self, state):
+        """ Play the move that starts the longest path of the agent in its own
+        region if the players are separated (see isolation.endgame), and
+        return True; otherwise return False
+        """
+        solution = solve(state)
+        if solution is None or solution[1] is None:
+            return False
+        self.telemetry = {"endgame": 1,
+                          "value": float("inf") if solution[0] == self.player_id else float("-inf")}
+        self.queue.put(solution[1])
+        return True
+
+    def reset_search(self):
+        """ Create the tables shared by every iteration of the deepening loop """
+        self.tt = TranspositionTable(TT_CAPACITY)
+        self.ordering = MoveOrderer()
+        self.nodes = 0
+        self.last_score = None
+
     def alphaBeta(self, state, depth):
         """ Return the move along a branch of the game tree that
-        has the best possible value.	
+        has the best possible value.
         """
+        if getattr(self, "tt", None) is None:
+            self.reset_search()
+        tt, ordering = self.tt, self.ordering
+        self.nodes = 0
+
+        def probe(state, depth, alpha, beta):
+            # Return (value, move, alpha, beta) after narrowing the window with a
+            # stored result; value is None unless the stored result is decisive
+            entry = tt.probe(state.zkey)
+            if entry is None:
+                return None, None, alpha, beta
+            if entry.depth < depth:
+                return None, entry.move, alpha, beta
+            if entry.flag == EXACT:
+                return entry.value, entry.move, alpha, beta
+            if entry.flag == LOWERBOUND:
+                alpha = max(alpha, entry.value)
+            else:
+                beta = min(beta, entry.value)
+            return (entry.value if alpha >= beta else None), entry.move, alpha, beta
+
+        def scout(bound):
+            # null-window searches need an integer-valued, finite window bound
+            return self.pvs and abs(bound) != float("inf")
+
+        def leaf_value(state):
+            # exact result once the players are separated, otherwise the heuristic
+            value = endgame_utility(state, self.player_id)
+            return self.score(state) if value is None else value
+
+        def store(state, depth, alpha, beta, v, move):
+            flag = LOWERBOUND if v >= beta else UPPERBOUND if v <= alpha else EXACT
+            tt.store(state.zkey, depth, flag, v, move)
+
         def min_value(state, depth, alpha, beta):
+            self.nodes += 1
             if state.terminal_test():
                 return state.utility(self.player_id)
-            if depth <= 0: 
-                return self.score(state)
+            if depth <= 0:
+                return leaf_value(state)
 
-            v = float("inf")
-            for a in state.actions():
-                v = min(v, max_value(state.result(a), depth-1, alpha, beta))
+            value, tt_move, a0, b0 = probe(state, depth, alpha, beta)
+            if value is not None:
+                return value
+
+            v, move = float("inf"), None
+            alpha, beta = a0, b0
+            ply = root_depth - depth
+            for a in ordering.order(state, state.actions(), ply, tt_move):
+                if move is None or not scout(beta):
+                    child = max_value(state.result(a), depth-1, alpha, beta)
+                else:
+                    # null-window search to prove the move is no better than beta
+                    child = max_value(state.result(a), depth-1, beta-1, beta)
+                    if alpha < child < beta:
+                        child = max_value(state.result(a), depth-1, alpha, child)
+                if move is None or child < v:
+                    v, move = child, a
                 beta = min(beta, v)
-                if v < alpha: 
-                    return v
+                if v <= alpha:
+                    ordering.record_cutoff(state, a, ply, depth)
+                    break
+            store(state, depth, a0, b0, v, move)
             return v
 
         def max_value(state, depth, alpha, beta):
-            if state.terminal_test(): 
+            self.nodes += 1
+            if state.terminal_test():
                 return state.utility(self.player_id)
-            if depth <= 0: 
-                return self.score(state)
+            if depth <= 0:
+                return leaf_value(state)
+
+            value, tt_move, a0, b0 = probe(state, depth, alpha, beta)
+            if value is not None:
+                return value
 
-            v = float("-inf")
-            for a in state.actions():
-                v = max(v, min_value(state.result(a), depth-1, alpha, beta))
+            v, move = float("-inf"), None
+            alpha, beta = a0, b0
+            ply = root_depth - depth
+            for a in ordering.order(state, state.actions(), ply, tt_move):
+                if move is None or not scout(alpha):
+                    child = min_value(state.result(a), depth-1, alpha, beta)
+                else:
+                    # null-window search to prove the move is no better than alpha
+                    child = min_value(state.result(a), depth-1, alpha, alpha+1)
+                    if alpha < child < beta:
+                        child = min_value(state.result(a), depth-1, child, beta)
+                if move is None or child > v:
+                    v, move = child, a
                 alpha = max(alpha, v)
-                if v > beta:
-                    return beta
+                if v >= beta:
+                    ordering.record_cutoff(state, a, ply, depth)
+                    break
+            store(state, depth, a0, b0, v, move)
             return v
 
-        # Alpha: Worst-case lower bound score that the MAX player could attain	
-        # Beta: Worst-case upper bound score that the MIN player could attain	
-        alpha = float("-inf")
-        beta = float("inf")
-        bestScore = float("-inf")
-        bestAction = None
-
-        for a in state.actions():	
-            v = min_value(state.result(a), depth-1, alpha, beta)	
-            alpha = max(v, alpha)
-            if v > bestScore:
-                bestScore = v
-                bestAction = a
-
-        if bestAction is None: 
+        def root(alpha, beta):
+            # Alpha: Worst-case lower bound score that the MAX player could attain
+            # Beta: Worst-case upper bound score that the MIN player could attain
+            bestScore = float("-inf")
+            bestAction = None
+
+            # search the best move from the previous iteration first
+            _, tt_move, _, _ = probe(state, depth, alpha, beta)
+            for a in ordering.order(state, state.actions(), 0, tt_move):
+                if bestAction is None or not scout(alpha):
+                    v = min_value(state.result(a), depth-1, alpha, beta)
+                else:
+                    v = min_value(state.result(a), depth-1, alpha, alpha+1)
+                    if alpha < v < beta:
+                        v = min_value(state.result(a), depth-1, v, beta)
+                alpha = max(v, alpha)
+                if v > bestScore:
+                    bestScore = v
+                    bestAction = a
+                if v >= beta:
+                    break
+            return bestScore, bestAction
+
+        root_depth = depth
+        inf = float("inf")
+        if self.pvs and self.last_score is not None and abs(self.last_score) != inf:
+            # aspiration window: open the search with a narrow window around the
+            # score of the previous iteration, and re-search if the result falls
+            # outside of the window (a bound that is already infinite cannot
+            # be widened, so a forced win or loss ends the loop)
+            alpha = self.last_score - ASPIRATION_WINDOW
+            beta = self.last_score + ASPIRATION_WINDOW
+            while True:
+                bestScore, bestAction = root(alpha, beta)
+                if bestScore <= alpha and alpha > -inf: alpha = -inf
+                elif bestScore >= beta and beta < inf: beta = inf
+                else: break
+        else:
+            bestScore, bestAction = root(-inf, inf)
+
+        if bestAction is None:
             bestAction = random.choice(state.actions())
+        else:
+            tt.store(state.zkey, depth, EXACT, bestScore, bestAction)
+        self.last_score = bestScore
         return bestAction
 
     def score(self, state):
         own_loc = state.locs[self.player_id]
         opp_loc = state.locs[1 - self.player_id]
-        own_liberties = state.liberties(own_loc)
-        opp_liberties = state.liberties(opp_loc)
-        return len(own_liberties) - len(opp_liberties)
+        return state.liberty_count(own_loc) - state.liberty_count(opp_loc)
+
+
+class PvsPlayer(AlphabetaPlayer):
+    """ Alpha-beta agent using principal variation search (NegaScout) with
+    null-window re-searches and aspiration windows for iterative deepening
+    """
+    pvs = True
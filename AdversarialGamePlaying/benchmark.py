@@ -0,0 +1,186 @@
+""" Search throughput benchmarks for the isolation agents
+
+Every benchmark runs one agent's search routine, without a time limit, on a
+fixed corpus of positions (generated from a seeded random number generator,
+so the corpus is the same on every machine and every commit):
+
+    alphabeta / pvs   AlphabetaPlayer.alphaBeta (and PvsPlayer) from depth 1
+                      to depth N on each position: nodes/sec and the total
+                      time to reach each depth
+    mcts              CustomPlayer.searchIteration for a fixed number of
+                      iterations on each position: playouts/sec
+    playouts          the random playout kernel alone: playouts/sec
+
+The results are written as JSON along with the commit hash, and two result
+files can be compared to spot speed regressions.
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import textwrap
+import time
+
+from isolation import Isolation, random_playouts
+from alpha_beta_player import AlphabetaPlayer, PvsPlayer
+from my_custom_player import CustomPlayer, MctTree, PLAYOUTS_PER_LEAF
+
+CORPUS_SEED = 20180418
+CORPUS_SIZE = 40
+MIN_PLY, MAX_PLY = 4, 40   # plies played at random to reach each corpus position
+SEARCH_DEPTH = 8           # deepest alpha-beta iteration timed on each position
+MCTS_ITERATIONS = 1000     # MCTS iterations run on each position
+PLAYOUTS = 200             # random playouts run from each position
+
+
+def make_corpus(size=CORPUS_SIZE, seed=CORPUS_SEED):
+    """ Return a reproducible list of non-terminal positions from random games """
+    rng = random.Random(seed)
+    corpus = []
+    while len(corpus) < size:
+        state = Isolation()
+        for _ in range(rng.randint(MIN_PLY, MAX_PLY)):
+            if state.terminal_test(): break
+            state = state.result(rng.choice(sorted(state.actions())))
+        if not state.terminal_test():
+            corpus.append(state)
+    return corpus
+
+
+def bench_alphabeta(corpus, agent_class=AlphabetaPlayer, depth=SEARCH_DEPTH):
+    """ Time iterative deepening to the given depth on every position """
+    nodes, seconds = 0, 0.
+    depth_seconds = [0.] * depth
+    for state in corpus:
+        agent = agent_class(state.player())
+        agent.reset_search()
+        start = time.perf_counter()
+        for d in range(1, depth + 1):
+            agent.alphaBeta(state, d)
+            nodes += agent.nodes
+            depth_seconds[d - 1] += time.perf_counter() - start
+        seconds += time.perf_counter() - start
+    return {"nodes": nodes, "seconds": seconds, "nodes_per_sec": nodes / seconds,
+            "seconds_to_depth": {str(d + 1): t for d, t in enumerate(depth_seconds)}}
+
+
+def bench_mcts(corpus, iterations=MCTS_ITERATIONS):
+    """ Time a fixed number of MCTS iterations on every position """
+    seconds = 0.
+    for state in corpus:
+        agent, tree = CustomPlayer(state.player()), MctTree()
+        start = time.perf_counter()
+        for _ in range(iterations):
+            agent.searchIteration(tree, state)
+        seconds += time.perf_counter() - start
+    playouts = len(corpus) * iterations * PLAYOUTS_PER_LEAF
+    return {"playouts": playouts, "seconds": seconds, "playouts_per_sec": playouts / seconds}
+
+
+def bench_playouts(corpus, n=PLAYOUTS):
+    """ Time the random playout kernel from every position """
+    start = time.perf_counter()
+    for state in corpus:
+        random_playouts(state.board, state.locs[0], state.locs[1], state.ply_count, n)
+    seconds = time.perf_counter() - start
+    return {"playouts": n * len(corpus), "seconds": seconds, "playouts_per_sec": n * len(corpus) / seconds}
+
+
+def _commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       universal_newlines=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(corpus_size=CORPUS_SIZE, depth=SEARCH_DEPTH, iterations=MCTS_ITERATIONS,
+                   playouts=PLAYOUTS, seed=CORPUS_SEED):
+    """ Run every benchmark and return the results as a JSON-serializable dict """
+    random.seed(seed)  # the MCTS benchmarks are random; fix the sequence as well
+    corpus = make_corpus(corpus_size, seed)
+    return {
+        "commit": _commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "corpus": {"size": corpus_size, "seed": seed},
+        "results": {
+            "alphabeta": bench_alphabeta(corpus, AlphabetaPlayer, depth),
+            "pvs": bench_alphabeta(corpus, PvsPlayer, depth),
+            "mcts": bench_mcts(corpus, iterations),
+            "playouts": bench_playouts(corpus, playouts),
+        },
+    }
+
+
+def compare(old, new):
+    """ Return the relative change (new / old - 1) of every throughput and
+    timing metric present in both benchmark results
+    """
+    changes = {}
+    for name, result in new["results"].items():
+        base = old["results"].get(name, {})
+        for key, value in result.items():
+            if isinstance(value, dict):
+                for k, v in value.items():
+                    if base.get(key, {}).get(k):
+                        changes["{}.{}.{}".format(name, key, k)] = v / base[key][k] - 1
+            elif key.endswith("_per_sec") or key == "seconds":
+                if base.get(key):
+                    changes["{}.{}".format(name, key)] = value / base[key] - 1
+    return changes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Measure the search throughput of the isolation agents.",
+        epilog=textwrap.dedent("""\
+            Example Usage:
+            --------------
+            - Benchmark the current commit and save the results:
+
+                $python benchmark.py -o bench-new.json
+
+            - Compare two saved results (positive changes in *_per_sec are speedups,
+              positive changes in seconds are slowdowns):
+
+                $python benchmark.py --compare bench-old.json bench-new.json
+        """)
+    )
+    parser.add_argument(
+        '-o', '--output', type=str, default=None,
+        help="Write the results to this JSON file (default: print them)."
+    )
+    parser.add_argument(
+        '-n', '--positions', type=int, default=CORPUS_SIZE,
+        help="Set the number of positions in the corpus."
+    )
+    parser.add_argument(
+        '-d', '--depth', type=int, default=SEARCH_DEPTH,
+        help="Set the deepest alpha-beta iteration on each position."
+    )
+    parser.add_argument(
+        '-i', '--iterations', type=int, default=MCTS_ITERATIONS,
+        help="Set the number of MCTS iterations on each position."
+    )
+    parser.add_argument(
+        '--compare', nargs=2, metavar=("OLD", "NEW"), default=None,
+        help="Compare two result files instead of running the benchmarks."
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f: old = json.load(f)
+        with open(args.compare[1]) as f: new = json.load(f)
+        print("Comparing {} to {}".format(old["commit"], new["commit"]))
+        for metric, change in sorted(compare(old, new).items()):
+            print("{:40s} {:+7.1%}".format(metric, change))
+    else:
+        results = run_benchmarks(args.positions, args.depth, args.iterations)
+        text = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text + "\n")
+        print(text)
@@ -0,0 +1,168 @@
+""" Vectorized evaluation of Isolation heuristics with NumPy
+
+The bitboard of a state (see isolation.Isolation) is wider than 64 bits, so
+every board is stored as a pair of uint64 words (the low and the high 64
+bits), and knight's moves are computed for a whole batch of boards at once
+with shifts across the two words. The padding columns of the bitboard keep
+knight's moves from wrapping around the edges, so the destination cells of a
+shift only need to be masked with the blank board.
+
+Features, for the player being evaluated ("own") and the opponent:
+
+    mobility         the number of open cells one knight's move away
+    mobility2        the number of open cells reachable in two knight's moves
+    centrality       minus the squared distance from the center of the board
+
+Unplaced players (location None) are passed as location -1, and all of their
+features are zero.
+"""
+import numpy as np
+
+from isolation.isolation import Action, _BLANK_BOARD, _WIDTH, _HEIGHT, _SIZE
+
+FEATURES = ("own_mobility", "own_mobility2", "own_centrality",
+            "opp_mobility", "opp_mobility2", "opp_centrality")
+
+# the liberty-difference heuristic used by the search agents
+DEFAULT_WEIGHTS = np.array([1., 0., 0., -1., 0., 0.])
+
+_MASK64 = (1 << 64) - 1
+_BLANK_LO = np.uint64(_BLANK_BOARD & _MASK64)
+_BLANK_HI = np.uint64(_BLANK_BOARD >> 64)
+
+_CENTRALITY = np.array([0.] + [
+    -((loc % (_WIDTH + 2) - (_WIDTH - 1) / 2) ** 2 + (loc // (_WIDTH + 2) - (_HEIGHT - 1) / 2) ** 2)
+    for loc in range(_SIZE)])  # indexed by loc + 1, so that location -1 scores 0
+
+
+def split_boards(boards):
+    """ Return the low & high 64-bit words of a sequence of integer bitboards """
+    boards = list(boards)
+    lo = np.array([b & _MASK64 for b in boards], dtype=np.uint64)
+    hi = np.array([b >> 64 for b in boards], dtype=np.uint64)
+    return lo, hi
+
+
+def to_arrays(states):
+    """ Return (board_lo, board_hi, loc0, loc1) arrays for a sequence of states """
+    states = list(states)
+    lo, hi = split_boards(s.board for s in states)
+    loc0 = np.array([-1 if s.locs[0] is None else s.locs[0] for s in states], dtype=np.int64)
+    loc1 = np.array([-1 if s.locs[1] is None else s.locs[1] for s in states], dtype=np.int64)
+    return lo, hi, loc0, loc1
+
+
+def _shift(lo, hi, n):
+    """ Shift 128-bit values stored as (lo, hi) words left by n bits (right if n < 0) """
+    if n > 0:
+        k, r = np.uint64(n), np.uint64(64 - n)
+        return lo << k, (hi << k) | (lo >> r)
+    k, r = np.uint64(-n), np.uint64(64 + n)
+    return (lo >> k) | (hi << r), hi >> k
+
+
+def _neighbors(lo, hi):
+    """ Return the cells one knight's move away from any cell in each board """
+    out_lo = np.zeros_like(lo)
+    out_hi = np.zeros_like(hi)
+    for action in Action:
+        s_lo, s_hi = _shift(lo, hi, int(action))
+        out_lo |= s_lo
+        out_hi |= s_hi
+    return out_lo & _BLANK_LO, out_hi & _BLANK_HI
+
+
+def _popcount(x):
+    """ Return the number of bits set in every element of a uint64 array """
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((x * np.uint64(0x0101010101010101)) >> np.uint64(56)).astype(np.int64)
+
+
+def _location_bits(locs):
+    """ Return the (lo, hi) words of a one-bit board at each location (empty for -1) """
+    locs = np.asarray(locs, dtype=np.int64)
+    one = np.uint64(1)
+    lo = np.where((locs >= 0) & (locs < 64), one << np.clip(locs, 0, 63).astype(np.uint64), np.uint64(0))
+    hi = np.where(locs >= 64, one << np.clip(locs - 64, 0, 63).astype(np.uint64), np.uint64(0))
+    return lo, hi
+
+
+def _player_features(board_lo, board_hi, locs):
+    lo, hi = _location_bits(locs)
+    lo, hi = _neighbors(lo, hi)
+    lo, hi = lo & board_lo, hi & board_hi
+    mobility = _popcount(lo) + _popcount(hi)
+    lo, hi = _neighbors(lo, hi)
+    mobility2 = _popcount(lo & board_lo) + _popcount(hi & board_hi)
+    return [mobility, mobility2, _CENTRALITY[np.asarray(locs) + 1]]
+
+
+def features(board_lo, board_hi, own_locs, opp_locs):
+    """ Compute the heuristic features of a batch of positions
+
+    Parameters
+    ----------
+    board_lo, board_hi : numpy.ndarray
+        uint64 arrays holding the low and high 64 bits of each board
+
+    own_locs, opp_locs : numpy.ndarray
+        Locations of the evaluated player and the opponent (-1 if unplaced)
+
+    Returns
+    -------
+    numpy.ndarray
+        A (len(board_lo), len(FEATURES)) array of feature values
+    """
+    own = _player_features(board_lo, board_hi, own_locs)
+    opp = _player_features(board_lo, board_hi, opp_locs)
+    return np.column_stack(own + opp).astype(np.float64)
+
+
+def evaluate(states, player_id, weights=DEFAULT_WEIGHTS):
+    """ Return the heuristic scores of a sequence of states for the given player """
+    lo, hi, loc0, loc1 = to_arrays(states)
+    own, opp = (loc0, loc1) if player_id == 0 else (loc1, loc0)
+    return features(lo, hi, own, opp) @ weights
+
+
+def evaluate_children(state, player_id, weights=DEFAULT_WEIGHTS):
+    """ Score every child of a search node in one call
+
+    Returns
+    -------
+    (list, numpy.ndarray)
+        The legal actions in the state and the score of the state that
+        each action leads to
+    """
+    actions = state.actions()
+    return actions, evaluate([state.result(a) for a in actions], player_id, weights)
+
+
+def fit_weights(X, y, ridge=0.):
+    """ Fit evaluation weights to target values by (ridge) least squares
+
+    Parameters
+    ----------
+    X : numpy.ndarray
+        (n, len(FEATURES)) feature matrix (see features)
+
+    y : numpy.ndarray
+        Target value of each position, e.g., the game outcome (+1/-1) or a
+        deep search value
+
+    ridge : float
+        L2 regularization strength (0 for ordinary least squares)
+
+    Returns
+    -------
+    numpy.ndarray
+        The weight of each feature
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if ridge:
+        A = X.T @ X + ridge * np.eye(X.shape[1])
+        return np.linalg.solve(A, X.T @ y)
+    return np.linalg.lstsq(X, y, rcond=None)[0]
@@ -13,13 +13,25 @@ from enum import Enum
 from multiprocessing import Process, Pipe
 from queue import Empty
 
-from .isolation import Isolation, DebugState
+from .isolation import Isolation, DebugState, Symmetry
+from .playouts import random_playout, random_playouts
 
-__all__ = ['Isolation', 'DebugState', 'Status', 'play', 'fork_get_action']
+__all__ = ['Isolation', 'DebugState', 'Symmetry', 'Status', 'GameResult', 'play', 'fork_get_action', 'AgentWorker',
+           'random_playout', 'random_playouts']
 logger = logging.getLogger(__name__)
 
 Agent = namedtuple("Agent", "agent_class name")
 
+
+class GameResult(namedtuple("GameResult", "winner game_history match_id")):
+    """ Result of a game (see _play); unpacks like the (winner, game_history,
+    match_id) tuple, and adds the per-move telemetry records in .telemetry
+    """
+    def __new__(cls, winner, game_history, match_id, telemetry=()):
+        self = super().__new__(cls, winner, game_history, match_id)
+        self.telemetry = list(telemetry)
+        return self
+
 PROCESS_TIMEOUT = 5  # time to interrupt agent search processes (in seconds)
 GAME_INFO = """\
 Initial game state: {}
@@ -54,24 +66,37 @@ class StopSearch(Exception): pass  # Exception class used to halt search
 
 class TimedQueue:
     """Modified queue class to block .put() after a time limit expires,
-    and to include both a context object & action choice in the queue.
+    and to include a context object, the action choice & a copy of the
+    agent's telemetry (with the time since the timer started, in
+    milliseconds) in the queue.
     """
     def __init__(self, receiver, sender, time_limit):
         self.__sender = sender
         self.__receiver = receiver
         self.__time_limit = time_limit / 1000
         self.__stop_time = None
+        self.__start_time = None
         self.agent = None
 
     def start_timer(self):
-        self.__stop_time = self.__time_limit + time.perf_counter()
+        self.__start_time = time.perf_counter()
+        self.__stop_time = self.__time_limit + self.__start_time
+
+    def remaining(self):
+        """ Return the number of seconds left before .put() is blocked """
+        if self.__stop_time is None:
+            return self.__time_limit
+        return self.__stop_time - time.perf_counter()
 
     def put(self, item, block=True, timeout=None):
         if self.__stop_time and time.perf_counter() > self.__stop_time:
             raise StopSearch
         if self.__receiver.poll():
             self.__receiver.recv()
-        self.__sender.send((getattr(self.agent, "context", None), item))
+        telemetry = dict(getattr(self.agent, "telemetry", None) or {})
+        if self.__start_time is not None:
+            telemetry["time"] = 1000 * (time.perf_counter() - self.__start_time)
+        self.__sender.send((getattr(self.agent, "context", None), item, telemetry))
 
     def put_nowait(self, item):
         self.put(item, block=False)
@@ -80,6 +105,8 @@ class TimedQueue:
         return self.__receiver.recv()
 
     def get_nowait(self):
+        if not self.__receiver.poll():
+            raise Empty
         return self.get(block=False)
 
     def qsize(self): return int(self.__receiver.poll())
@@ -90,7 +117,7 @@ class TimedQueue:
 def play(args): return _play(*args)  # multithreading ThreadPool.map doesn't expand args
 
 
-def _play(agents, game_state, time_limit, match_id, debug=False):
+def _play(agents, game_state, time_limit, match_id, debug=False, persistent=False):
     """ Run a match between two agents by alternately soliciting them to
     select a move and applying it to advance the game state.
 
@@ -108,29 +135,61 @@ def _play(agents, game_state, time_limit, match_id, debug=False):
         The maximum number of milliseconds to allow before timeout during
         each turn (see notes)
 
+    persistent : bool
+        If True (and debug is False), each agent runs in one long-lived
+        AgentWorker process for the whole game instead of a new process
+        for every move
+
     Returns
     -------
-    (agent, list<[(int, int),]>, Status)
-        Return multiple including the winning agent, the actions that
-        were applied to the initial state, a status code describing the
-        reason the game ended, and any error information
+    GameResult
+        The winning agent, the actions that were applied to the initial
+        state, and the match id; the telemetry attribute holds one record
+        (dict) per move with the agent name, ply, timeout flag and the
+        statistics that the agent reported in its telemetry attribute
     """
     initial_state = game_state
     game_history = []
     state_history = []
-    winner = None
-    status = Status.NORMAL
+    telemetry = []
     players = [a.agent_class(player_id=i) for i, a in enumerate(agents)]
+    workers = [AgentWorker(p) for p in players] if persistent and not debug else None
     logger.info(GAME_INFO.format(initial_state, *agents))
+    try:
+        winner, loser, game_state, status = _play_turns(
+            agents, players, workers, game_state, game_history, telemetry, time_limit, debug)
+    finally:
+        for worker in workers or []:
+            worker.stop()
+
+    logger.info(RESULT_INFO.format(status, game_state, game_history, state_history, winner, loser))
+    return GameResult(winner, game_history, match_id, telemetry)
+
+
+def _play_turns(agents, players, workers, game_state, game_history, telemetry, time_limit, debug):
+    """ Alternately solicit the agents for moves until the game is over, or
+    until an agent fails to make a valid move (see _play)
+    """
+    initial_state = game_state
+    winner = loser = None
+    status = Status.NORMAL
     while not game_state.terminal_test():
         active_idx = game_state.player()
 
         # any problems during get_action means the active player loses
         winner, loser = agents[1 - active_idx], agents[active_idx]
 
+        record = {"agent": agents[active_idx].name, "ply": game_state.ply_count, "timeout": False}
+        telemetry.append(record)
+        players[active_idx].telemetry = None
         try:
-            action = fork_get_action(game_state, players[active_idx], time_limit, debug)
+            if workers:
+                action = workers[active_idx].get_action(game_state, time_limit)
+            else:
+                action = fork_get_action(game_state, players[active_idx], time_limit, debug)
+            record.update(players[active_idx].telemetry or {})
         except Empty:
+            record["timeout"] = True
             status = Status.TIMEOUT
             logger.warn(textwrap.dedent("""\
                 The queue was empty after get_action() was called. This means that either
@@ -158,9 +217,7 @@ def _play(agents, game_state, time_limit, match_id, debug=False):
         status = Status.GAME_OVER
         if game_state.utility(active_idx) > 0:
             winner, loser = loser, winner  # swap winner/loser if active player won
-
-    logger.info(RESULT_INFO.format(status, game_state, game_history, state_history, winner, loser))
-    return winner, game_history, match_id
+    return winner, loser, game_state, status
 
 
 def fork_get_action(game_state, active_player, time_limit, debug=False):
@@ -169,9 +226,9 @@ def fork_get_action(game_state, active_player, time_limit, debug=False):
     if debug:  # run the search in the main process and thread
         from copy import deepcopy
         active_player.queue = None
-        active_player = deepcopy(active_player)
-        active_player.queue = action_queue
-        _request_action(active_player, action_queue, game_state)
+        search_player = deepcopy(active_player)
+        search_player.queue = action_queue
+        _request_action(search_player, action_queue, game_state)
         time.sleep(time_limit / 1000)
     else:  # spawn a new process to run the search function
         try:
@@ -180,16 +237,90 @@ def fork_get_action(game_state, active_player, time_limit, debug=False):
             p.join(timeout=PROCESS_TIMEOUT + time_limit / 1000)
         finally:
             if p and p.is_alive(): p.terminate()
-    new_context, action = action_queue.get_nowait()  # raises Empty if agent did not respond
+    new_context, action, telemetry = action_queue.get_nowait()  # raises Empty if agent did not respond
     active_player.context = new_context
+    active_player.telemetry = telemetry
     return action
 
 
+class AgentWorker:
+    """ Long-lived process that runs get_action() for one agent for every turn
+    of a game, instead of starting a new process for every move
+
+    Game states (and the agent context) are sent to the worker over a pipe,
+    and the worker reports the actions through a TimedQueue exactly like the
+    process started by fork_get_action(), so the time limit and timeout
+    behavior are unchanged. A worker that overruns the timeout is killed and
+    a new one is started for the next move. (Unlike fork_get_action(), other
+    attributes that the agent sets during a turn persist between turns.)
+    """
+    def __init__(self, agent):
+        self.agent = agent
+        self.process = None
+
+    def start(self):
+        self.conn, worker_conn = Pipe()
+        self.receiver, sender = Pipe()
+        self.process = Process(target=_worker_loop, args=(self.agent, worker_conn, self.receiver, sender))
+        self.process.start()
+        # close the parent copies of the worker ends, so that reading from a
+        # pipe whose worker was killed raises EOFError instead of blocking
+        worker_conn.close()
+        sender.close()
+
+    def stop(self):
+        if self.process is None: return
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive(): self.process.terminate()
+        self.process = None
+
+    def get_action(self, game_state, time_limit):
+        if self.process is None or not self.process.is_alive():
+            self.start()
+        while self.receiver.poll():  # discard any result left over from a previous turn
+            self.receiver.recv()
+        self.conn.send((game_state, self.agent.context, time_limit))
+        if self.conn.poll(PROCESS_TIMEOUT + time_limit / 1000):
+            self.conn.recv()
+        else:  # the worker overran the time limit; kill it & respawn on the next move
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+        if not self.receiver.poll():
+            raise Empty
+        try:
+            new_context, action, telemetry = self.receiver.recv()
+        except (EOFError, OSError):
+            raise Empty
+        self.agent.context = new_context
+        self.agent.telemetry = telemetry
+        return action
+
+
+def _worker_loop(agent, conn, receiver, sender):
+    """ Serve get_action() requests for AgentWorker until a None request """
+    while True:
+        request = conn.recv()
+        if request is None: break
+        game_state, context, time_limit = request
+        agent.context = context
+        try:
+            _request_action(agent, TimedQueue(receiver, sender, time_limit), game_state)
+        except Exception as err:
+            logger.error("Agent {!s} raised an exception: {!s}".format(agent, err))
+        conn.send(True)
+
+
 def _request_action(agent, queue, game_state):
     """ Augment agent instances with a countdown timer on every method before
     calling the get_action() method and catch countdown timer exceptions.
     """
     agent.queue = queue
+    agent.telemetry = {}
     queue.agent = agent
     try:
         queue.start_timer()
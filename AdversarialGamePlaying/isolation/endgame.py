@@ -0,0 +1,121 @@
+""" Partition detection and exact endgame solver for knight's Isolation
+
+Once no open cell can be reached by both players, the players can no longer
+interfere with each other, and the game is decided by the length of the
+longest knight's path that each player can make inside their own region:
+players alternate moves, so the player to move wins if (and only if) their
+longest path is longer than their opponent's.
+"""
+from .isolation import _MOVE_MASKS, _popcount
+
+ENDGAME_MAX_CELLS = 24     # largest region that the longest-path solver will search
+ENDGAME_MAX_OPEN = 50      # solve() skips the partition test while more cells than this are open
+ENDGAME_CACHE_SIZE = 2**18  # the path cache is cleared when it grows past this many entries
+
+_path_cache = {}  # (region board, location) -> longest path length
+
+
+def reachable(board, loc, stop=0):
+    """ Return a bitboard of the open cells reachable from loc by a sequence
+    of knight's moves over open cells (not including loc itself)
+
+    The flood fill returns early (with a partial region) as soon as it
+    reaches any cell in the `stop` bitboard.
+    """
+    seen = 0
+    frontier = board & _MOVE_MASKS[loc]
+    while frontier:
+        seen |= frontier
+        if seen & stop:
+            break
+        neighbors = 0
+        while frontier:
+            bit = frontier & -frontier
+            neighbors |= _MOVE_MASKS[bit.bit_length() - 1]
+            frontier ^= bit
+        frontier = neighbors & board & ~seen
+    return seen
+
+
+def is_partitioned(state):
+    """ Return True if both players are on the board and no open cell is
+    reachable by both of them
+
+    (If the regions of the two players shared a cell, the region of the first
+    player would include one of the open cells next to the second player, so
+    a single flood fill is enough.)
+    """
+    loc0, loc1 = state.locs
+    if loc0 is None or loc1 is None:
+        return False
+    stop = state.board & _MOVE_MASKS[loc1]
+    return not reachable(state.board, loc0, stop) & stop
+
+
+def longest_path(board, loc):
+    """ Return the number of moves in the longest knight's path from loc that
+    only visits open cells (each cell at most once)
+
+    The search is memoized on (open cells in the region, location), and stops
+    early once a path visits every cell of the region.
+    """
+    region = reachable(board, loc)
+    if len(_path_cache) > ENDGAME_CACHE_SIZE:
+        _path_cache.clear()
+    return _longest_path(region, loc, _popcount(region))
+
+
+def _longest_path(board, loc, limit):
+    key = (board, loc)
+    best = _path_cache.get(key)
+    if best is not None:
+        return best
+    best = 0
+    moves = board & _MOVE_MASKS[loc]
+    while moves and best < limit:
+        bit = moves & -moves
+        moves ^= bit
+        length = 1 + _longest_path(board ^ bit, bit.bit_length() - 1, limit - 1)
+        if length > best:
+            best = length
+    _path_cache[key] = best
+    return best
+
+
+def solve(state):
+    """ Solve a partitioned position exactly
+
+    Returns
+    -------
+    (int, Action or None) or None
+        The id of the winning player and the action that starts the longest
+        path of the player to move (None if they have no moves), or None if
+        the players are not separated, a region is larger than
+        ENDGAME_MAX_CELLS, or the board has more than ENDGAME_MAX_OPEN open
+        cells (which keeps the test cheap enough to run at every leaf of a
+        search in the early game)
+    """
+    if _popcount(state.board) > ENDGAME_MAX_OPEN or not is_partitioned(state):
+        return None
+    board, player = state.board, state.player()
+    own_loc, opp_loc = state.locs[player], state.locs[1 - player]
+    if (_popcount(reachable(board, own_loc)) > ENDGAME_MAX_CELLS
+            or _popcount(reachable(board, opp_loc)) > ENDGAME_MAX_CELLS):
+        return None
+    best_length, best_action = 0, None
+    for action in state.actions():
+        length = 1 + longest_path(board ^ (1 << (own_loc + action)), own_loc + action)
+        if length > best_length:
+            best_length, best_action = length, action
+    winner = player if best_length > longest_path(board, opp_loc) else 1 - player
+    return winner, best_action
+
+
+def endgame_utility(state, player_id):
+    """ Return the exact utility of a partitioned position for the given
+    player (see Isolation.utility), or None if it cannot be solved
+    """
+    solution = solve(state)
+    if solution is None:
+        return None
+    return float("inf") if solution[0] == player_id else float("-inf")
@@ -3,6 +3,7 @@
 #                          DO NOT MODIFY THIS FILE                            #
 ###############################################################################
 from enum import IntEnum
+from random import Random
 from typing import NamedTuple
 
 
@@ -33,6 +34,85 @@ class Action(IntEnum):
 
 _ACTIONSET = set(Action)  # used for efficient membership testing
 
+# Precompute the knight's-move neighborhood of every cell on the board. For
+# each index, _MOVES[loc] lists the (action, destination bit) pairs that stay
+# on the board, and _MOVE_MASKS[loc] is the union of the destination bits, so
+# that the legal moves from loc on any board are simply `board & _MOVE_MASKS[loc]`
+_MOVES = [[(a, 1 << (loc + a)) for a in Action
+           if 0 <= loc + a < _SIZE and _BLANK_BOARD & (1 << (loc + a))]
+          for loc in range(_SIZE)]
+_MOVE_MASKS = [sum(bit for _, bit in moves) for moves in _MOVES]
+
+
+class Symmetry(IntEnum):
+    """ The reflections that map the board onto itself. Every symmetry is its
+    own inverse, and ROTATE_180 is the composition of the two flips.
+    """
+    IDENTITY = 0
+    FLIP_HORIZONTAL = 1  # mirror the columns (x -> _WIDTH - 1 - x)
+    FLIP_VERTICAL = 2    # mirror the rows (y -> _HEIGHT - 1 - y)
+    ROTATE_180 = 3
+
+# Reflections operate on whole rows of the bitboard: a horizontal flip reverses
+# the bits of every row with a lookup table, and a vertical flip reverses the
+# order of the rows
+_ROW_MASK = (1 << _WIDTH) - 1
+_ROW_SHIFTS = [y * (_WIDTH + 2) for y in range(_HEIGHT)]
+_ROW_REVERSE = [int("{:0{}b}".format(r, _WIDTH)[::-1], 2) for r in range(1 << _WIDTH)]
+
+
+def reflect_cell(loc, symmetry):
+    """ Return the index of the image of cell loc under a board symmetry """
+    x, y = loc % (_WIDTH + 2), loc // (_WIDTH + 2)
+    if symmetry & Symmetry.FLIP_HORIZONTAL: x = _WIDTH - 1 - x
+    if symmetry & Symmetry.FLIP_VERTICAL: y = _HEIGHT - 1 - y
+    return x + y * (_WIDTH + 2)
+
+_REFLECTED_CELLS = [[reflect_cell(loc, symmetry) for loc in range(_SIZE)] for symmetry in Symmetry]
+
+
+def reflect_board(board, symmetry):
+    """ Return the image of a bitboard under a board symmetry """
+    rows = [(board >> shift) & _ROW_MASK for shift in _ROW_SHIFTS]
+    if symmetry & Symmetry.FLIP_HORIZONTAL:
+        rows = [_ROW_REVERSE[r] for r in rows]
+    if symmetry & Symmetry.FLIP_VERTICAL:
+        rows.reverse()
+    image = 0
+    for r, shift in zip(rows, _ROW_SHIFTS):
+        image |= r << shift
+    return image
+
+
+# Zobrist keys: one random 63-bit string per blocked cell, per (player, location)
+# pair and for the side to move. (63 bits so that the key fits in a machine word
+# and can be returned from __hash__ unchanged.) The generator is seeded so that
+# keys are the same in every process, and therefore safe to store on disk.
+_zobrist_rng = Random(0x15014710)
+_ZOBRIST_CELLS = [_zobrist_rng.getrandbits(63) for _ in range(_SIZE)]
+_ZOBRIST_LOCS = [[_zobrist_rng.getrandbits(63) for _ in range(_SIZE)] for _ in range(2)]
+_ZOBRIST_SIDE = _zobrist_rng.getrandbits(63)
+del _zobrist_rng
+
+
+def _zobrist(board, ply_count, locs):
+    """ Compute the Zobrist key of a game state from scratch """
+    key = _ZOBRIST_SIDE if ply_count % 2 else 0
+    blocked = _BLANK_BOARD & ~board
+    while blocked:
+        bit = blocked & -blocked
+        key ^= _ZOBRIST_CELLS[bit.bit_length() - 1]
+        blocked ^= bit
+    for player_id, loc in enumerate(locs):
+        if loc is not None:
+            key ^= _ZOBRIST_LOCS[player_id][loc]
+    return key
+
+
+def _popcount(x):
+    """ Return the number of bits set in the integer x """
+    return bin(x).count("1")
+
 
 class Isolation(NamedTuple('Isolation', [('board', int), ('ply_count', int), ('locs', int)])):
     """ Bitboard implementation of knight's Isolation game state
@@ -55,9 +135,22 @@ class Isolation(NamedTuple('Isolation', [('board', int), ('ply_count', int), ('l
         A pair of values defining the location of each player. Default for
         each player is None while the player has not yet placed their piece
         on the board; otherwise an integer.
+
+    zkey: int
+        Zobrist key of the state (not a tuple field). The key is updated
+        incrementally by result(), and is used as the hash of the state so
+        that states are cheap to use as dictionary keys.
     """
-    def __new__(cls, board=_BLANK_BOARD, ply_count=0, locs=(None, None)):
-        return super(Isolation, cls).__new__(cls, board, ply_count, locs)
+    def __new__(cls, board=_BLANK_BOARD, ply_count=0, locs=(None, None), zkey=None):
+        self = super(Isolation, cls).__new__(cls, board, ply_count, locs)
+        self.zkey = _zobrist(board, ply_count, locs) if zkey is None else zkey
+        return self
+
+    def __hash__(self):
+        return self.zkey
+
+    def __getnewargs__(self):
+        return (self.board, self.ply_count, self.locs, self.zkey)
 
     def actions(self):
         """ Return a list of the legal actions in the current state
@@ -74,7 +167,76 @@ class Isolation(NamedTuple('Isolation', [('board', int), ('ply_count', int), ('l
         loc = self.locs[self.player()]
         if loc is None:
             return self.liberties(loc)
-        return [a for a in Action if (a + loc) >= 0 and (self.board & (1 << (a + loc)))]
+        board = self.board
+        return [a for a, bit in _MOVES[loc] if board & bit]
+
+    def actions_mask(self):
+        """ Return a bitboard with ones at the destination cells of every legal
+        action in the current state
+
+        Returns
+        -------
+        int
+            The bitwise AND of the open cells and the knight's-move neighborhood
+            of the active player (or all open cells on the opening move)
+        """
+        loc = self.locs[self.player()]
+        if loc is None:
+            return self.board
+        return self.board & _MOVE_MASKS[loc]
+
+    def reflect(self, symmetry):
+        """ Return the image of the state under a board symmetry
+
+        Parameters
+        ----------
+        symmetry : Symmetry
+            The reflection to apply to the board and player locations
+
+        Returns
+        -------
+        Isolation
+            A new state object; its Zobrist key is computed from scratch
+        """
+        if symmetry == Symmetry.IDENTITY:
+            return self
+        cells = _REFLECTED_CELLS[symmetry]
+        locs = tuple(None if loc is None else cells[loc] for loc in self.locs)
+        return Isolation(reflect_board(self.board, symmetry), self.ply_count, locs)
+
+    def reflect_action(self, action, symmetry):
+        """ Return the image of an action in the current state under a board
+        symmetry, i.e., the action that self.reflect(symmetry) must apply to
+        reach self.result(action).reflect(symmetry)
+        """
+        cells = _REFLECTED_CELLS[symmetry]
+        loc = self.locs[self.player()]
+        if loc is None:
+            return cells[action]
+        return Action(cells[loc + action] - cells[loc])
+
+    def canonical(self):
+        """ Return the canonical representative of the state's symmetry class
+
+        All of the images of a state under the board symmetries share the same
+        canonical representative, so caches keyed on the canonical state (or
+        its zkey) collapse up to four positions into one entry. Images are
+        ordered by (board, locs), with an unplaced player before any location.
+
+        Returns
+        -------
+        (Isolation, Symmetry)
+            The smallest image of the state and the symmetry that produces it
+            (which also maps the canonical state back to this state)
+        """
+        best_key, best_symmetry = None, Symmetry.IDENTITY
+        for symmetry in Symmetry:
+            cells = _REFLECTED_CELLS[symmetry]
+            key = (reflect_board(self.board, symmetry),
+                   tuple(-1 if loc is None else cells[loc] for loc in self.locs))
+            if best_key is None or key < best_key:
+                best_key, best_symmetry = key, symmetry
+        return self.reflect(best_symmetry), best_symmetry
 
     def player(self):
         """ Return the id (zero for first player, one for second player) of player
@@ -99,18 +261,22 @@ class Isolation(NamedTuple('Isolation', [('board', int), ('ply_count', int), ('l
         Isolation
             A new state object with the input move applied.
         """
-        player_location = self.locs[self.player()]
-        assert player_location is None or action in _ACTIONSET, \
+        player = self.player()
+        start_location = self.locs[player]
+        assert start_location is None or action in _ACTIONSET, \
             "{} is not a valid action from the set {}".format(action, list(Action))
-        if player_location is None:
-            player_location = 0
-        player_location = int(action) + player_location
+        player_location = int(action) + (start_location or 0)
         if not (self.board & (1 << player_location)):
             raise RuntimeError("Invalid move: target cell blocked")
         # update the board to block the ending cell from the new move
         board = self.board ^ (1 << player_location)
-        locs = (self.locs[0], player_location) if self.player() else (player_location, self.locs[1])
-        return Isolation(board=board, ply_count=self.ply_count + 1, locs=locs)
+        locs = (self.locs[0], player_location) if player else (player_location, self.locs[1])
+        # update the Zobrist key: block the cell, move the player & flip the side to move
+        zlocs = _ZOBRIST_LOCS[player]
+        zkey = self.zkey ^ _ZOBRIST_CELLS[player_location] ^ zlocs[player_location] ^ _ZOBRIST_SIDE
+        if start_location is not None:
+            zkey ^= zlocs[start_location]
+        return Isolation(board=board, ply_count=self.ply_count + 1, locs=locs, zkey=zkey)
 
     def terminal_test(self):
         """ Return True if either player has no legal moves, otherwise False
@@ -165,8 +331,31 @@ class Isolation(NamedTuple('Isolation', [('board', int), ('ply_count', int), ('l
             A list containing the position of open liberties in the
             neighborhood of the starting position
         """
-        cells = range(_SIZE) if loc is None else (loc + a for a in Action)
-        return [c for c in cells if c >= 0 and self.board & (1 << c)]
+        board = self.board
+        if loc is None:
+            return [c for c in range(_SIZE) if board & (1 << c)]
+        return [loc + a for a, bit in _MOVES[loc] if board & bit]
+
+    def liberty_count(self, loc):
+        """ Return the number of liberties in the neighborhood of `loc`
+
+        Equivalent to `len(self.liberties(loc))`, but computed with a single
+        bitwise AND against the precomputed neighborhood mask of `loc`.
+
+        Parameters
+        ----------
+        loc : int
+            A position on the current board to use as the anchor point for
+            available liberties (i.e., open cells neighboring the anchor point)
+
+        Returns
+        -------
+        int
+            The number of open cells in the neighborhood of the starting position
+        """
+        if loc is None:
+            return _popcount(self.board)
+        return _popcount(self.board & _MOVE_MASKS[loc])
 
     def _has_liberties(self, player_id):
         """ Return True if the player has any legal moves in the given state
@@ -175,7 +364,10 @@ class Isolation(NamedTuple('Isolation', [('board', int), ('ply_count', int), ('l
         -------
             Isolation.liberties()
         """
-        return any(self.liberties(self.locs[player_id]))
+        loc = self.locs[player_id]
+        if loc is None:
+            return self.board != 0
+        return (self.board & _MOVE_MASKS[loc]) != 0
 
 
 class DebugState(Isolation):
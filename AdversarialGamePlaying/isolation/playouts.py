@@ -0,0 +1,66 @@
+""" Random playout kernel for Monte Carlo search agents
+
+The functions in this module simulate games on the raw integer fields of an
+Isolation state (board, player locations and ply count) using the precomputed
+knight's-move tables, without allocating an Isolation object for every ply.
+"""
+import random
+
+from .isolation import _MOVES, _MOVE_MASKS, _SIZE
+
+# (destination cell, destination bit) pairs for every cell on the board
+_DESTINATIONS = [[(loc + a, bit) for a, bit in moves] for loc, moves in enumerate(_MOVES)]
+
+
+def random_playout(board, loc0, loc1, ply_count, rand=random.random):
+    """ Play random moves from the given position until the game ends
+
+    Parameters
+    ----------
+    board : int
+        Bitboard of open cells (see Isolation.board)
+
+    loc0, loc1 : int or None
+        Locations of the first and second player
+
+    ply_count : int
+        Number of actions applied so far; identifies the active player
+
+    rand : callable
+        Source of uniform random numbers in [0, 1)
+
+    Returns
+    -------
+    int
+        The id of the winning player
+    """
+    locs = [loc0, loc1]
+    player = ply_count % 2
+    while True:
+        loc, opp_loc = locs[player], locs[1 - player]
+        # same terminal rules as Isolation.terminal_test() & Isolation.utility()
+        if not (board if loc is None else board & _MOVE_MASKS[loc]):
+            return 1 - player
+        if not (board if opp_loc is None else board & _MOVE_MASKS[opp_loc]):
+            return player
+        if loc is None:
+            moves = [(c, 1 << c) for c in range(_SIZE) if board & (1 << c)]
+        else:
+            moves = [m for m in _DESTINATIONS[loc] if board & m[1]]
+        loc, bit = moves[int(rand() * len(moves))]
+        board ^= bit
+        locs[player] = loc
+        player ^= 1
+
+
+def random_playouts(board, loc0, loc1, ply_count, n, rand=random.random):
+    """ Run n random playouts from the same position (see random_playout)
+
+    Returns
+    -------
+    int
+        The number of playouts won by the player that is active in the
+        starting position
+    """
+    player = ply_count % 2
+    return sum(random_playout(board, loc0, loc1, ply_count, rand) == player for _ in range(n))
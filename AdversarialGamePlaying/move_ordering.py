@@ -0,0 +1,53 @@
+from collections import defaultdict
+
+
+class MoveOrderer:
+    """ Move ordering for alpha-beta search
+
+    Moves are tried in the following order:
+
+        1. the best move stored for the state in the transposition table
+           (the principal variation move from the previous iteration)
+        2. killer moves -- moves that caused a cutoff at the same ply
+           in a sibling subtree
+        3. all remaining moves, sorted by the history heuristic (how often
+           and how deep a move to the same destination caused a cutoff)
+
+    Attributes
+    ----------
+    killers : dict
+        Mapping from ply (distance to the root) to a list of the most recent
+        killer moves at that ply (newest first)
+
+    history : dict
+        Mapping from (player id, destination cell) to the accumulated cutoff
+        score of moves to that cell
+    """
+    def __init__(self, num_killers=2):
+        self.num_killers = num_killers
+        self.killers = defaultdict(list)
+        self.history = defaultdict(int)
+
+    def order(self, state, actions, ply, tt_move=None):
+        """ Return the actions sorted so that the most promising moves come first """
+        killers = self.killers[ply]
+        history = self.history
+        player = state.player()
+        loc = state.locs[player] or 0
+
+        def key(action):
+            if action == tt_move: return (0, 0)
+            if action in killers: return (1, killers.index(action))
+            return (2, -history[(player, loc + action)])
+        return sorted(actions, key=key)
+
+    def record_cutoff(self, state, action, ply, depth):
+        """ Update the killer and history tables after action caused a cutoff
+        with the given remaining search depth
+        """
+        killers = self.killers[ply]
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[self.num_killers:]
+        player = state.player()
+        self.history[(player, (state.locs[player] or 0) + action)] += depth * depth
@@ -1,82 +1,361 @@
 from sample_players import DataPlayer
+from isolation import random_playouts
+from array import array
+from collections import deque
+from multiprocessing import Pool
+import os
+import pickle
 import random
 import math
+import time
+
+REUSE_MIN_VISITS = 2      # smallest visit count of a node whose children are saved for the next turn
+REUSE_MAX_NODES = 1000    # largest number of nodes saved for the next turn
+CONTEXT_INTERVAL = 64     # number of iterations between snapshots of the tree
+PLAYOUTS_PER_LEAF = 1     # number of random playouts simulated from each new leaf
+
+MAX_WORKERS = 4           # largest worker pool used by the parallel search modes
+NUM_WORKERS = min(os.cpu_count() or 1, MAX_WORKERS)
+ROOT_SLICE = 0.02         # seconds each root-parallel worker searches between merges
+LEAF_BATCH = 8            # leaves selected per worker in each leaf-parallel batch (one pool job)
+LEAF_PLAYOUTS = 4         # random playouts simulated from each leaf in the leaf-parallel mode
+VIRTUAL_LOSS = 1          # visits (each counted as a loss) added to pending paths
 
 class CustomPlayer(DataPlayer):
     """ Implementation of Monte Carlo tree search agent to play knight's Isolation
-    """    
+
+    The search tree is reused between turns: a pruned snapshot of the tree is
+    saved in self.context (which survives the process boundary of each turn),
+    and the grandchild of the old root that matches the new state after our
+    move and the opponent's reply becomes the root of the next search.
+
+    Set `parallel` to "root" or "leaf" (see RootParallelPlayer and
+    LeafParallelPlayer) to spread the search over a pool of NUM_WORKERS
+    processes. The pool is started on the first turn and kept by the agent,
+    so when the agent runs in a persistent worker (see isolation.AgentWorker
+    and run_match.py --persistent) every turn of the game uses the same pool.
+    The default harness runs every turn in a new process with a copy of the
+    agent that has no pool, so each turn starts (and pays for) a new one.
+    """
+    parallel = None
+    _pool = None
+
+    def __getstate__(self):
+        # the worker pool belongs to the process that started it
+        state = self.__dict__.copy()
+        state.pop("_pool", None)
+        return state
+
+    def workerPool(self):
+        """ Return the agent's worker pool, starting it on first use
+
+        The pool is not pickled with the agent (see __getstate__), so it only
+        outlives the turn when the agent runs in a persistent worker.
+        """
+        if self._pool is None:
+            self._pool = Pool(NUM_WORKERS, initializer=random.seed)
+        return self._pool
+
     def get_action(self, state):
-        """ Employ MCTS adversarial search technique to choose an action 
+        """ Employ MCTS adversarial search technique to choose an action
         (a move) available in the current state.
-        """        
-        v0 = MctNode(state, None)
+        """
+        if state.terminal_test():
+            # there is nothing to search below a terminal state
+            actions = state.actions()
+            self.queue.put(random.choice(actions) if actions else None)
+            return
+        book_action = self.probe_book(state)
+        if book_action is not None:
+            self.queue.put(book_action)
+            return
+        if self.parallel == "root":
+            return self.rootParallelSearch(state)
+        tree = self.restoreTree(state)
+        if self.parallel == "leaf":
+            return self.leafParallelSearch(tree, state)
+        iterations = 0
+        last_action = None
+        while True:
+            self.searchIteration(tree, state)
+            best = tree.bestChild(0, 0)
+            action = tree.action[best]
+            snapshot = iterations % CONTEXT_INTERVAL == 0
+            if snapshot:
+                self.context = self.saveTree(tree, state)
+            iterations += 1
+            # every put() sends the context, so only send a new action or a new snapshot
+            if snapshot or action != last_action:
+                self.telemetry = {"playouts": iterations * PLAYOUTS_PER_LEAF, "nodes": len(tree),
+                                  "value": tree.value(best)}
+                self.queue.put(action)
+                last_action = action
+
+    def searchIteration(self, tree, state):
+        """ Run one select-expand-simulate-backup iteration of MCTS """
+        v1, s1 = self.treePolicy(tree, state)
+        delta = self.defaultPolicy(s1, PLAYOUTS_PER_LEAF)
+        self.backupNegaMax(tree, v1, delta, PLAYOUTS_PER_LEAF)
+
+    def rootParallelSearch(self, state):
+        """ Root parallelization: every worker grows an independent tree from the
+        same root, and the root visit counts of all trees are merged after each
+        time slice to choose the action with the most visits
+        """
+        root_stats = {}  # worker pid -> [(action, visits), ...] for the root's children
+        pool = self.workerPool()
         while True:
-            _, v1 = self.treePolicy(v0)
-            delta = self.defaultPolicy(v1.state)
-            self.backupNegaMax(v1, delta)
-            action, _ = v0.bestChild(0)
-            self.queue.put(action)
-            
-    def treePolicy(self, v):
-        a = None
-        while v.nonTerminal():
-          if not v.fullyExpanded(): 
-              return v.expand()
-          else: 
-              a, v = v.bestChild(1.4)
-        return a, v
-
-    def backupNegaMax(self, v, delta):
-        while v is not None:
-            v.N, v.Q = v.N + 1, v.Q + delta
+            jobs = [(state, self.context, ROOT_SLICE)] * NUM_WORKERS
+            root_stats.update(pool.map(_root_parallel_search, jobs, chunksize=1))
+            visits = {}
+            for children in root_stats.values():
+                for action, n in children:
+                    visits[action] = visits.get(action, 0) + n
+            self.telemetry = {"playouts": sum(visits.values()) * PLAYOUTS_PER_LEAF}
+            self.queue.put(max(visits, key=visits.get))
+
+    def leafParallelSearch(self, tree, state):
+        """ Leaf parallelization: select a batch of leaves from one shared tree,
+        using virtual loss to spread the selections over different paths, then
+        simulate all of the leaves in the worker pool at once
+        """
+        pool = self.workerPool()
+        remaining = getattr(self.queue, "remaining", None)
+        # each batch runs LEAF_BATCH * NUM_WORKERS iterations, so count the
+        # snapshot interval in batches
+        interval = max(1, CONTEXT_INTERVAL // (LEAF_BATCH * NUM_WORKERS))
+        batches = 0
+        last_action = None
+        while True:
+            start = time.perf_counter()
+            leaves = []
+            for _ in range(LEAF_BATCH * NUM_WORKERS):
+                v1, s1 = self.treePolicy(tree, state)
+                self.virtualLoss(tree, v1, VIRTUAL_LOSS)
+                leaves.append((v1, s1))
+            # each job simulates LEAF_PLAYOUTS playouts from each of LEAF_BATCH leaves
+            jobs = [[(s.board, s.locs[0], s.locs[1], s.ply_count, LEAF_PLAYOUTS)
+                     for _, s in leaves[i:i + LEAF_BATCH]]
+                    for i in range(0, len(leaves), LEAF_BATCH)]
+            wins = [w for batch in pool.map(_leaf_playouts, jobs, chunksize=1) for w in batch]
+            for (v1, _), w in zip(leaves, wins):
+                self.virtualLoss(tree, v1, -VIRTUAL_LOSS)
+                self.backupNegaMax(tree, v1, LEAF_PLAYOUTS - 2 * w, LEAF_PLAYOUTS)
+            best = tree.bestChild(0, 0)
+            action = tree.action[best]
+            # also save the tree when the next batch may not finish before the deadline
+            batch_time = time.perf_counter() - start
+            snapshot = (batches % interval == 0
+                        or remaining is not None and remaining() < 2 * batch_time)
+            if snapshot:
+                self.context = self.saveTree(tree, state)
+            batches += 1
+            if snapshot or action != last_action:
+                self.telemetry = {"playouts": batches * len(leaves) * LEAF_PLAYOUTS,
+                                  "nodes": len(tree), "value": tree.value(best)}
+                self.queue.put(action)
+                last_action = action
+
+    def saveTree(self, tree, state):
+        """ Return a compact, pickled snapshot (root state, pruned tree) of the
+        search tree (see MctTree.subtree)
+        """
+        return pickle.dumps((state, tree.subtree(0)), pickle.HIGHEST_PROTOCOL)
+
+    def restoreTree(self, state):
+        """ Return the tree for a search from the given state, rebuilt from the
+        grandchild of the previous root when a snapshot is available
+        """
+        if self.context is None:
+            return MctTree()
+        root_state, old_tree = pickle.loads(self.context)
+        for v1 in old_tree.children(0):
+            s1 = root_state.result(old_tree.action[v1])
+            for v2 in old_tree.children(v1):
+                if s1.result(old_tree.action[v2]) == state:
+                    return old_tree.subtree(v2)
+        return MctTree()
+
+    def treePolicy(self, tree, state):
+        """ Descend from the root to a leaf using UCT, expanding the leaf if it
+        has not been visited before; return the leaf and its state
+        """
+        v = 0
+        while True:
+            if tree.first_child[v] < 0:
+                if state.terminal_test():
+                    return v, state
+                tree.expand(v, state.actions())
+            v = tree.bestChild(v, 1.4)
+            state = state.result(tree.action[v])
+            if tree.visits[v] == 0:
+                return v, state
+
+    def backupNegaMax(self, tree, v, delta, n=1):
+        visits, values, parent = tree.visits, tree.values, tree.parent
+        while v >= 0:
+            visits[v] += n
+            values[v] += delta
             delta = -delta
-            v = v.parent
+            v = parent[v]
 
-    def defaultPolicy(self, state):
-        s = state
-        player = s.player()
-        while not s.terminal_test():
-            a = random.choice(s.actions())
-            s = s.result(a)
-        return 1 if s.utility(player)  < 0 else -1
+    def virtualLoss(self, tree, v, n):
+        """ Add n visits that count as losses for the player choosing each node
+        on the path from the root to v (a negative n removes them again)
+        """
+        visits, values, parent = tree.visits, tree.values, tree.parent
+        while v >= 0:
+            visits[v] += n
+            values[v] -= n
+            v = parent[v]
+
+    def defaultPolicy(self, state, n=1):
+        """ Return the total reward of n random playouts from the state for the
+        player who moved into it (+1 for each playout the player to move loses,
+        -1 for each playout they win)
+        """
+        wins = random_playouts(state.board, state.locs[0], state.locs[1], state.ply_count, n)
+        return n - 2 * wins
 
     def score(self, state):
         own_loc = state.locs[self.player_id]
         opp_loc = state.locs[1 - self.player_id]
-        own_liberties = state.liberties(own_loc)
-        opp_liberties = state.liberties(opp_loc)
-        return len(own_liberties) - len(opp_liberties)
-
-class MctNode:
-    def __init__(self, state, parent):
-        self.state = state
-        self.parent = parent
-        self.untriedActions = state.actions()
-        self.actions = []
-        self.children = []
-        self.Q = 0
-        self.N = 0
-                    
-    def nonTerminal(self):
-        return (not self.state.terminal_test())
-
-    def fullyExpanded(self):
-        return len(self.untriedActions) == 0
-
-    def bestChild(self, c = 1.4):
-        bestAction, bestChild, bestReward = None, None, float("-inf")
-        for a, v2 in zip(self.actions, self.children):
-            v2Reward = v2.Q/v2.N + c * math.sqrt(2 * math.log(self.N) / v2.N)
-            if v2Reward > bestReward:
-                bestReward, bestAction = v2Reward, a
-                bestChild = v2
-        return bestAction, bestChild
-
-    def expand(self):
-        a = random.choice(self.untriedActions)
-        self.untriedActions.remove(a)
-        s2 = self.state.result(a)
-        v2 = MctNode(s2, self)
-        self.actions.append(a)
-        self.children.append(v2)
-        return a, v2
+        return state.liberty_count(own_loc) - state.liberty_count(opp_loc)
+
+
+class RootParallelPlayer(CustomPlayer):
+    """ MCTS agent using root parallelization over a process pool """
+    parallel = "root"
+
+
+class LeafParallelPlayer(CustomPlayer):
+    """ MCTS agent using leaf parallelization with virtual loss over a process pool """
+    parallel = "leaf"
+
+
+_worker_search = None  # (root key, agent, tree) of the root-parallel search in a pool worker
+
+def _root_parallel_search(job):
+    """ Grow this worker's tree for the given number of seconds, and return the
+    worker's pid with the (action, visits) statistics of the root's children
+    """
+    global _worker_search
+    state, context, seconds = job
+    if _worker_search is None or _worker_search[0] != state.zkey:
+        agent = CustomPlayer(state.player())
+        agent.context = context
+        _worker_search = (state.zkey, agent, agent.restoreTree(state))
+    _, agent, tree = _worker_search
+    stop_time = time.perf_counter() + seconds
+    while time.perf_counter() < stop_time:
+        agent.searchIteration(tree, state)
+    return os.getpid(), [(tree.action[v], tree.visits[v]) for v in tree.children(0)]
+
+
+def _leaf_playouts(batch):
+    """ Return the number of random playouts won by the active player from
+    each leaf in a batch of (board, loc0, loc1, ply_count, n) jobs
+    """
+    return [random_playouts(*job) for job in batch]
+
+
+class MctTree:
+    """ Structure-of-arrays storage for a Monte Carlo search tree
+
+    Nodes are integer indices into parallel arrays (node 0 is the root). The
+    children of a node are allocated together when the node is expanded, so
+    they occupy the contiguous block first_child[v]:first_child[v] + num_children[v].
+    Game states are not stored; they are recomputed by applying action[v]
+    along the path from the root.
+
+    Attributes
+    ----------
+    visits : array
+        N -- the number of playouts through each node
+
+    values : array
+        Q -- the sum of playout rewards for the player who moved into each node
+
+    parent : array
+        Index of the parent of each node (-1 for the root)
+
+    first_child : array
+        Index of the first child of each node (-1 until the node is expanded)
+
+    num_children : array
+        Number of children of each node
+
+    action : array
+        The action applied to the parent state to reach each node
+    """
+    def __init__(self, visits=0, value=0.):
+        self.visits = array('i', [visits])
+        self.values = array('d', [value])
+        self.parent = array('i', [-1])
+        self.first_child = array('i', [-1])
+        self.num_children = array('B', [0])
+        self.action = array('h', [0])
+
+    def __len__(self):
+        return len(self.visits)
+
+    def children(self, v):
+        first = self.first_child[v]
+        return range(first, first + self.num_children[v]) if first >= 0 else range(0)
+
+    def expand(self, v, actions):
+        """ Allocate (unvisited) children of node v for each of the actions """
+        n = len(actions)
+        self.first_child[v] = len(self.visits)
+        self.num_children[v] = n
+        self.visits.extend([0] * n)
+        self.values.extend([0.] * n)
+        self.parent.extend([v] * n)
+        self.first_child.extend([-1] * n)
+        self.num_children.extend([0] * n)
+        self.action.extend(actions)
+
+    def value(self, v):
+        """ Return the mean playout reward of node v (0 if it was never visited) """
+        return self.values[v] / self.visits[v] if self.visits[v] else 0.
+
+    def bestChild(self, v, c=1.4):
+        """ Return the child of v with the highest UCT score
+
+        Unvisited children are selected first (in random order) while exploring
+        (c > 0), and are only returned for c == 0 if no child has been visited.
+        """
+        first = self.first_child[v]
+        last = first + self.num_children[v]
+        visits = self.visits[first:last]
+        if 0 in visits:
+            unvisited = [i for i, n in enumerate(visits) if n == 0]
+            if c > 0 or len(unvisited) == len(visits):
+                return first + random.choice(unvisited)
+        exploration = 2 * math.log(self.visits[v])
+        scores = [q / n + c * math.sqrt(exploration / n) if n else float("-inf")
+                  for q, n in zip(self.values[first:last], visits)]
+        return first + scores.index(max(scores))
+
+    def subtree(self, v, max_nodes=REUSE_MAX_NODES, min_visits=REUSE_MIN_VISITS):
+        """ Return a copy of the subtree rooted at node v as a new tree
+
+        Nodes are copied in breadth-first order. The children of a node are
+        only copied if it was visited at least min_visits times and the copy
+        would not exceed max_nodes nodes; otherwise the node is copied as an
+        unexpanded leaf (keeping its own statistics).
+        """
+        tree = MctTree(self.visits[v], self.values[v])
+        frontier = deque([(v, 0)])
+        while frontier:
+            old, new = frontier.popleft()
+            n = self.num_children[old]
+            if n == 0 or self.visits[old] < min_visits or len(tree) + n > max_nodes:
+                continue
+            first = self.first_child[old]
+            tree.expand(new, self.action[first:first + n])
+            new_first = tree.first_child[new]
+            tree.visits[new_first:new_first + n] = self.visits[first:first + n]
+            tree.values[new_first:new_first + n] = self.values[first:first + n]
+            frontier.extend((first + i, new_first + i) for i in range(n))
+        return tree
@@ -0,0 +1,157 @@
+""" Build an opening book for knight's Isolation
+
+Every position in the first N plies of the game is searched with iterative
+deepening alpha-beta search, and the best move for each position is saved in
+`data.pickle`, where it is loaded by DataPlayer (see DataPlayer.probe_book).
+
+Positions that are reflections of each other (horizontal, vertical and 180
+degree rotation of the board) are only searched once, and the searches run
+in parallel on a pool of worker processes. Finished searches are saved to a
+checkpoint file, so an interrupted build can be resumed by running the same
+command again.
+
+The book is a dictionary mapping the Zobrist key of the canonical image of
+each position (see Isolation.canonical) to the action chosen in that image.
+"""
+import argparse
+import logging
+import os
+import pickle
+import textwrap
+import time
+
+from multiprocessing import Pool
+
+from isolation import Isolation
+from alpha_beta_player import AlphabetaPlayer
+
+logger = logging.getLogger(__name__)
+
+BOOK_FILE = "data.pickle"
+BOOK_PLIES = 4          # positions with fewer plies than this are included in the book
+BOOK_DEPTH = 8          # maximum search depth for each position
+BOOK_SECONDS = 2.0      # iterative deepening stops starting new depths after this many seconds
+CHECKPOINT_INTERVAL = 50  # number of finished searches between checkpoint saves
+NUM_PROCS = os.cpu_count() or 1
+
+
+def book_positions(plies):
+    """ Return the canonical representatives of every position reachable in
+    fewer than `plies` moves from the empty board, in breadth-first order
+    """
+    positions = []
+    frontier = [Isolation()]
+    for _ in range(plies):
+        positions.extend(frontier)
+        children = {}
+        for state in frontier:
+            for action in state.actions():
+                child, _ = state.result(action).canonical()
+                if not child.terminal_test():
+                    children[child.zkey] = child
+        frontier = list(children.values())
+    return positions
+
+
+def _search_position(job):
+    """ Return the Zobrist key of the state with the move chosen by iterative
+    deepening alpha-beta search (see BOOK_DEPTH & BOOK_SECONDS)
+    """
+    state, max_depth, seconds = job
+    agent = AlphabetaPlayer(state.player())
+    agent.reset_search()
+    stop_time = time.perf_counter() + seconds
+    action = None
+    for depth in range(1, max_depth + 1):
+        action = agent.alphaBeta(state, depth)
+        if time.perf_counter() > stop_time:
+            break
+    return state.zkey, action
+
+
+def _load(filename):
+    # a missing, truncated or corrupt file is treated as an empty book
+    try:
+        with open(filename, "rb") as f:
+            return pickle.load(f)
+    except (IOError, EOFError, ValueError, pickle.UnpicklingError):
+        return {}
+
+
+def _save(obj, filename):
+    # write to a temporary file first, so an interrupted save cannot leave a
+    # truncated checkpoint behind
+    with open(filename + ".tmp", "wb") as f:
+        pickle.dump(obj, f, pickle.HIGHEST_PROTOCOL)
+    os.replace(filename + ".tmp", filename)
+
+
+def build_book(plies=BOOK_PLIES, depth=BOOK_DEPTH, seconds=BOOK_SECONDS,
+               filename=BOOK_FILE, processes=NUM_PROCS):
+    """ Search every canonical position in the first `plies` plies and save
+    the book, resuming from the checkpoint file (filename + ".partial") of an
+    earlier, interrupted build if one exists
+
+    Returns
+    -------
+    dict
+        The book, mapping the Zobrist key of every canonical position to an action
+    """
+    checkpoint = filename + ".partial"
+    moves = _load(checkpoint)  # canonical zkey -> action
+    positions = {s.zkey: s for s in book_positions(plies)}
+    jobs = [(s, depth, seconds) for key, s in positions.items() if key not in moves]
+    logger.info("Searching {} of {} positions".format(len(jobs), len(positions)))
+    if jobs:
+        with Pool(processes) as pool:
+            for i, (key, action) in enumerate(pool.imap_unordered(_search_position, jobs), 1):
+                moves[key] = action
+                if i % CHECKPOINT_INTERVAL == 0:
+                    _save(moves, checkpoint)
+                    logger.info("Searched {} of {} positions".format(i, len(jobs)))
+        _save(moves, checkpoint)
+
+    book = {key: moves[key] for key in positions if moves[key] is not None}
+    _save(book, filename)
+    os.remove(checkpoint)
+    return book
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Build an opening book (data.pickle) for the search agents.",
+        epilog=textwrap.dedent("""\
+            Example Usage:
+            --------------
+            - Search every position in the first 4 plies for up to 2 seconds each
+              with 8 processes (run the same command again to resume):
+
+                $python opening_book.py -n 4 -s 2 -p 8
+        """)
+    )
+    parser.add_argument(
+        '-n', '--plies', type=int, default=BOOK_PLIES,
+        help="Include every position with fewer than this many plies in the book."
+    )
+    parser.add_argument(
+        '-d', '--depth', type=int, default=BOOK_DEPTH,
+        help="Set the maximum search depth for each position."
+    )
+    parser.add_argument(
+        '-s', '--seconds', type=float, default=BOOK_SECONDS,
+        help="Stop deepening the search of a position after this many seconds."
+    )
+    parser.add_argument(
+        '-p', '--processes', type=int, default=NUM_PROCS,
+        help="Set the number of parallel processes to use for the searches."
+    )
+    parser.add_argument(
+        '-o', '--output', type=str, default=BOOK_FILE,
+        help="Set the name of the book file."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    book = build_book(args.plies, args.depth, args.seconds, args.output, args.processes)
+    print("Saved {} positions to {}".format(len(book), args.output))
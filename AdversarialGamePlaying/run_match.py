@@ -2,67 +2,117 @@
 #                    YOU DO NOT NEED TO MODIFY THIS FILE                      #
 ###############################################################################
 import argparse
+import json
 import logging
 import math
 import os
 import random
 import textwrap
 
-from collections import namedtuple
-from multiprocessing.pool import ThreadPool as Pool
+from collections import Counter, defaultdict, namedtuple
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 
 from isolation import Isolation, Agent, play
 from sample_players import RandomPlayer, GreedyPlayer, MinimaxPlayer
-from my_custom_player import CustomPlayer
-from alpha_beta_player import AlphabetaPlayer
+from my_custom_player import CustomPlayer, RootParallelPlayer, LeafParallelPlayer, NUM_WORKERS
+from alpha_beta_player import AlphabetaPlayer, PvsPlayer
 
 logger = logging.getLogger(__name__)
 
-NUM_PROCS = 1
+NUM_PROCS = os.cpu_count() or 1  # number of games played in parallel
 NUM_ROUNDS = 1    # number times to replicate the match; increase for higher confidence estimate
 TIME_LIMIT = 150  # number of milliseconds before timeout
 
+SPRT_ELO0 = 0     # Elo difference of the null hypothesis
+SPRT_ELO1 = 50    # Elo difference of the alternative hypothesis
+SPRT_ALPHA = 0.05 # false positive rate
+SPRT_BETA = 0.05  # false negative rate
+SPRT_BATCH = 5    # rounds played between each test
+
+TELEMETRY_FILE = "telemetry.jsonl"  # per-agent telemetry histograms, written next to matches.log
+TELEMETRY_BINS = {"time": 10, "depth": 1, "tt_hit_rate": 0.05}  # other statistics use powers of two
+
 TEST_AGENTS = {
     "RANDOM": Agent(RandomPlayer, "Random Agent"),
     "GREEDY": Agent(GreedyPlayer, "Greedy Agent"),
     "MINIMAX": Agent(MinimaxPlayer, "Minimax Agent"),
-    "SELF": Agent(CustomPlayer, "Custom TestAgent")
+    "SELF": Agent(CustomPlayer, "Custom TestAgent"),
+    "ALPHABETA": Agent(AlphabetaPlayer, "Alphabeta Agent"),
+    "PVS": Agent(PvsPlayer, "PVS Agent"),
+    "ROOT_MCTS": Agent(RootParallelPlayer, "Root Parallel MCTS Agent"),
+    "LEAF_MCTS": Agent(LeafParallelPlayer, "Leaf Parallel MCTS Agent")
 }
 
-Match = namedtuple("Match", "players initial_state time_limit match_id debug_flag")
+Match = namedtuple("Match", "players initial_state time_limit match_id debug_flag persistent")
+
+def _run_matches(matches, name, num_processes=NUM_PROCS, debug=True, fair_matches=False):
+    """ Play the matches on a pool of worker processes and return the results
+    in the order that the games finish
 
-def _run_matches(matches, name, num_processes=NUM_PROCS, debug=True):
+    If fair_matches is true, then the fair duplicate of each game (see
+    make_fair_match) is scheduled as soon as the original game finishes.
+    Debug mode plays every game in the current process instead.
+    """
     results = []
-    pool = Pool(1) if debug else Pool(num_processes)
-    print("Running {} games:".format(len(matches)))
-    for result in pool.imap_unordered(play, matches):
-        print("+" if result[0].name == name else '-', end="")
+    print("Running {} games:".format(len(matches) * (1 + int(fair_matches))))
+
+    def report(match, result):
+        print("+" if result[0].name == name else '-', end="", flush=True)
         results.append(result)
+        fair_match = make_fair_match(match, result) if fair_matches and match.match_id >= 0 else None
+        return [] if fair_match is None else [fair_match]
+
+    if debug:
+        queue = list(matches)
+        while queue:
+            match = queue.pop(0)
+            queue.extend(report(match, play(match)))
+    else:
+        with ProcessPoolExecutor(num_processes) as executor:
+            pending = {executor.submit(play, match): match for match in matches}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for fair_match in report(pending.pop(future), future.result()):
+                        pending[executor.submit(play, fair_match)] = fair_match
     print()
     return results
 
 
-def make_fair_matches(matches, results):
-    new_matches = []
-    for _, game_history, match_id in results:
-        if len(game_history) < 2:
-            logger.warn(textwrap.dedent("""\
-                Unable to duplicate match {}
-                -- one of the players forfeit at the first move
-                """.format(match_id)))
-            continue
-        match = matches[match_id]
-        state = Isolation().result(game_history[0]).result(game_history[1])
-        fair_match = Match(players=match.players[::-1],
-                          initial_state=state,
-                          time_limit=match.time_limit,
-                          match_id=-match.match_id,
-                          debug_flag=match.debug_flag)
-        new_matches.append(fair_match)
-    return new_matches
-
-
-def play_matches(custom_agent, test_agent, cli_args):
+def make_fair_match(match, result):
+    """ Return a copy of the match with the players swapped, starting from the
+    position after the opening moves of the game that produced the result (or
+    None if one of the players forfeit at the first move)
+    """
+    _, game_history, match_id = result
+    if len(game_history) < 2:
+        logger.warn(textwrap.dedent("""\
+            Unable to duplicate match {}
+            -- one of the players forfeit at the first move
+            """.format(match_id)))
+        return None
+    state = Isolation().result(game_history[0]).result(game_history[1])
+    return Match(players=match.players[::-1],
+                 initial_state=state,
+                 time_limit=match.time_limit,
+                 match_id=-1 - match.match_id,
+                 debug_flag=match.debug_flag,
+                 persistent=match.persistent)
+
+
+def match_processes(processes, agents):
+    """ Return the number of games to play in parallel with the agents
+
+    The root & leaf parallel MCTS agents each start a pool of NUM_WORKERS
+    processes, so the number of games is divided by the number of pool
+    workers in each game to keep the total number of processes close to
+    the number of processes requested.
+    """
+    workers = sum(NUM_WORKERS for agent in agents if getattr(agent.agent_class, "parallel", None))
+    return max(1, processes // max(1, workers))
+
+
+def play_matches(custom_agent, test_agent, cli_args, rounds=None, first_round=0):
     """ Play a specified number of rounds between two agents. Each round
     consists of two games, and each player plays as first player in one
     game and second player in the other. (This mitigates "unfair" games
@@ -74,45 +124,191 @@ def play_matches(custom_agent, test_agent, cli_args):
     player a victory. Playing "fair" matches this way will balance out the
     advantage of picking perfect openings (the player would win the first
     time, and then lose when their opponent uses that move against them).
+
+    Returns the number of games won by the custom agent, the number of
+    games played, and the telemetry records of every move.
     """
     matches = []
-    for match_id in range(cli_args.rounds):
+    rounds = cli_args.rounds if rounds is None else rounds
+    for match_id in range(first_round, first_round + rounds):
         state = Isolation()
         matches.append(Match(
             players=(test_agent, custom_agent),
             initial_state=state,
             time_limit=cli_args.time_limit,
             match_id=2 * match_id,
-            debug_flag=cli_args.debug))
+            debug_flag=cli_args.debug,
+            persistent=cli_args.persistent))
         matches.append(Match(
             players=(custom_agent, test_agent),
             initial_state=state,
             time_limit=cli_args.time_limit,
             match_id=2 * match_id + 1,
-            debug_flag=cli_args.debug))
-
-    # Run all matches -- must be done before fair matches in order to populate
-    # the first move from each player; these moves are reused in the fair matches
-    results = _run_matches(matches, custom_agent.name, cli_args.processes)
+            debug_flag=cli_args.debug,
+            persistent=cli_args.persistent))
 
-    if cli_args.fair_matches:
-        _matches = make_fair_matches(matches, results)
-        results.extend(_run_matches(_matches, custom_agent.name, cli_args.processes))
+    # Run all matches -- each fair match is scheduled when the original game
+    # finishes, because it reuses the first move from each player
+    processes = match_processes(cli_args.processes, (custom_agent, test_agent))
+    results = _run_matches(matches, custom_agent.name, processes,
+                           cli_args.debug, cli_args.fair_matches)
 
     wins = sum(int(r[0].name == custom_agent.name) for r in results)
-    return wins, len(matches) * (1 + int(cli_args.fair_matches))
+    return wins, len(results), [record for r in results for record in r.telemetry]
+
+
+def _telemetry_bin(value, width):
+    """ Return the lower bound of the histogram bin that contains the value """
+    if width:
+        return round(math.floor(value / width) * width, 6)
+    return 0 if value < 1 else 2 ** int(math.log2(value))
+
+
+def telemetry_histograms(records):
+    """ Summarize the telemetry records of every move by agent
+
+    Returns
+    -------
+    list<dict>
+        One summary per agent, with the number of moves & timeouts and, for
+        every numeric statistic reported by the agent, the mean and a
+        histogram (mapping the lower bound of each bin to its count, see
+        TELEMETRY_BINS) of its finite values
+    """
+    moves_by_agent = defaultdict(list)
+    for record in records:
+        moves_by_agent[record["agent"]].append(record)
+    summaries = []
+    for agent, moves in sorted(moves_by_agent.items()):
+        stats = defaultdict(list)
+        for record in moves:
+            for key, value in record.items():
+                if (key not in ("agent", "ply", "timeout") and isinstance(value, (int, float))
+                        and math.isfinite(value)):
+                    stats[key].append(value)
+        summary = {"agent": agent, "moves": len(moves),
+                   "timeouts": sum(record["timeout"] for record in moves),
+                   "mean": {}, "histograms": {}}
+        for key, values in sorted(stats.items()):
+            counts = Counter(_telemetry_bin(v, TELEMETRY_BINS.get(key)) for v in values)
+            summary["mean"][key] = sum(values) / len(values)
+            summary["histograms"][key] = {str(b): counts[b] for b in sorted(counts)}
+        summaries.append(summary)
+    return summaries
+
+
+def write_telemetry(records, filename=TELEMETRY_FILE):
+    """ Write the per-agent telemetry summaries as JSON lines """
+    with open(filename, "w") as f:
+        for summary in telemetry_histograms(records):
+            f.write(json.dumps(summary) + "\n")
+
+
+def elo_difference(wins, num_games, z=1.96):
+    """ Return the Elo rating difference implied by the score of the custom
+    agent, with the bounds of its confidence interval
+
+    The interval is the Wilson score interval of the binomial score (z=1.96
+    for 95% confidence), converted to Elo. A score of 0% (or 100%) maps to an
+    infinite difference and an infinite lower (or upper) bound, but the other
+    bound of the interval stays finite.
+
+    Returns
+    -------
+    (float, float, float)
+        The Elo difference and the lower & upper bounds of the interval
+    """
+    def elo(p):
+        # scores within round-off of 0 or 1 are treated as exactly 0 or 1
+        if p <= 1e-12: return float("-inf")
+        if p >= 1 - 1e-12: return float("inf")
+        return -400 * math.log10(1 / p - 1)
+
+    p = wins / num_games
+    center = p + z * z / (2 * num_games)
+    margin = z * math.sqrt(p * (1 - p) / num_games + z * z / (4 * num_games * num_games))
+    scale = 1 + z * z / num_games
+    low = max(0., (center - margin) / scale)
+    high = min(1., (center + margin) / scale)
+    return elo(p), elo(low), elo(high)
+
+
+def sprt_llr(wins, losses, elo0, elo1):
+    """ Return the log-likelihood ratio of the hypotheses that the Elo
+    difference is elo1 (H1) rather than elo0 (H0), given the game results
+    (Isolation has no draws, so every game is a Bernoulli trial)
+    """
+    p0 = 1 / (1 + 10 ** (-elo0 / 400))
+    p1 = 1 / (1 + 10 ** (-elo1 / 400))
+    return wins * math.log(p1 / p0) + losses * math.log((1 - p1) / (1 - p0))
+
+
+def sprt_bounds(alpha, beta):
+    """ Return the (lower, upper) LLR bounds of a sequential probability
+    ratio test with false positive rate alpha and false negative rate beta
+    """
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def play_sprt(custom_agent, test_agent, cli_args):
+    """ Play batches of rounds between two agents until a sequential probability
+    ratio test decides between H0 (the custom agent is elo0 stronger) and H1
+    (it is elo1 stronger), or until cli_args.rounds rounds have been played
+
+    Returns
+    -------
+    (int, int, list, bool or None)
+        The number of games won by the custom agent, the number of games
+        played, the telemetry records of every move, and True if H1 was
+        accepted, False if H0 was accepted, or None if the test was
+        inconclusive
+    """
+    lower, upper = sprt_bounds(cli_args.alpha, cli_args.beta)
+    wins = num_games = rounds = 0
+    telemetry = []
+    while rounds < cli_args.rounds:
+        batch = min(cli_args.batch, cli_args.rounds - rounds)
+        batch_wins, batch_games, batch_telemetry = play_matches(
+            custom_agent, test_agent, cli_args, batch, rounds)
+        telemetry.extend(batch_telemetry)
+        rounds += batch
+        wins += batch_wins
+        num_games += batch_games
+        llr = sprt_llr(wins, num_games - wins, cli_args.elo0, cli_args.elo1)
+        info = "SPRT after {} games: {} wins, LLR {:.2f} (bounds {:.2f}, {:.2f})".format(
+            num_games, wins, llr, lower, upper)
+        logger.info(info)
+        print(info)
+        if llr <= lower: return wins, num_games, telemetry, False
+        if llr >= upper: return wins, num_games, telemetry, True
+    return wins, num_games, telemetry, None
 
 
 def main(args):
     test_agent = TEST_AGENTS[args.opponent.upper()]
-    # custom_agent = Agent(CustomPlayer, "Custom Agent")
-    custom_agent = Agent(AlphabetaPlayer, "Alphabeta Agent")
-    wins, num_games = play_matches(custom_agent, test_agent, args)
+    custom_agent = TEST_AGENTS[args.custom.upper()]
+    if custom_agent == test_agent:
+        raise ValueError("The custom agent and the opponent must be different agents")
+    if args.sprt:
+        wins, num_games, telemetry, accepted = play_sprt(custom_agent, test_agent, args)
+    else:
+        wins, num_games, telemetry = play_matches(custom_agent, test_agent, args)
+    write_telemetry(telemetry)
 
     logger.info("Your agent won {:.1f}% of matches against {}".format(
        100. * wins / num_games, test_agent.name))
     print("Your agent won {:.1f}% of matches against {}".format(
        100. * wins / num_games, test_agent.name))
+    elo, elo_low, elo_high = elo_difference(wins, num_games)
+    info = "Elo difference: {:+.1f} (95% confidence interval {:+.1f} to {:+.1f})".format(
+        elo, elo_low, elo_high)
+    if args.sprt:
+        info += "\nSPRT result: {}".format(
+            "inconclusive" if accepted is None else
+            "H1 accepted (elo >= {})".format(args.elo1) if accepted else
+            "H0 accepted (elo <= {})".format(args.elo0))
+    logger.info(info)
+    print(info)
     print()
 
 
@@ -130,7 +326,16 @@ if __name__ == "__main__":
 
             - Run 100 rounds (100 rounds = 200 games) against the minimax agent with 1 process:
 
-                $python run_match.py -r 100
+                $python run_match.py -r 100 -p 1
+
+            - Benchmark principal variation search against plain alpha-beta search:
+
+                $python run_match.py -f -r 50 -c PVS -o ALPHABETA
+
+            - Play up to 500 rounds against the greedy agent, stopping as soon as the
+              SPRT decides whether the custom agent is at least 50 Elo stronger:
+
+                $python run_match.py -s -r 500 -o GREEDY --elo0 0 --elo1 50
         """)
     )
     parser.add_argument(
@@ -142,6 +347,13 @@ if __name__ == "__main__":
             terminating your code.
         """
     )
+    parser.add_argument(
+        '--persistent', action="store_true",
+        help="""\
+            Keep one worker process per agent for the whole game instead of starting a
+            new process for every move. Agents keep any state they set between turns.
+        """
+    )
     parser.add_argument(
         '-f', '--fair_matches', action="store_true",
         help="""\
@@ -168,10 +380,18 @@ if __name__ == "__main__":
             for initial testing because they run more quickly than the minimax agent.
         """
     )
+    parser.add_argument(
+        '-c', '--custom', type=str, default='ALPHABETA', choices=list(TEST_AGENTS.keys()),
+        help="""\
+            Choose the agent to evaluate against the opponent (default: the alpha-beta agent).
+        """
+    )
     parser.add_argument(
         '-p', '--processes', type=int, default=NUM_PROCS,
         help="""\
-            Set the number of parallel processes to use for running matches.  WARNING: 
+            Set the number of parallel processes to use for running matches (default: the
+            number of cores).  Games with a root or leaf parallel MCTS agent share these
+            processes with the agent's worker pool.  WARNING: 
             Windows users may see inconsistent performance using >1 thread.  Check the 
             log file for time out errors and increase the time limit (add 50-100ms) if 
             your agent performs poorly.
@@ -181,16 +401,49 @@ if __name__ == "__main__":
         '-t', '--time_limit', type=int, default=TIME_LIMIT,
         help="Set the maximum allowed time (in milliseconds) for each call to agent.get_action()."
     )
+    parser.add_argument(
+        '-s', '--sprt', action="store_true",
+        help="""\
+            Play batches of rounds until a sequential probability ratio test decides
+            whether the Elo difference of the custom agent is elo0 or elo1. The number
+            of rounds (-r) is the maximum number of rounds to play.
+        """
+    )
+    parser.add_argument(
+        '--elo0', type=float, default=SPRT_ELO0,
+        help="Elo difference of the null hypothesis (H0) of the SPRT."
+    )
+    parser.add_argument(
+        '--elo1', type=float, default=SPRT_ELO1,
+        help="Elo difference of the alternative hypothesis (H1) of the SPRT."
+    )
+    parser.add_argument(
+        '--alpha', type=float, default=SPRT_ALPHA,
+        help="Probability that the SPRT accepts H1 when H0 is true."
+    )
+    parser.add_argument(
+        '--beta', type=float, default=SPRT_BETA,
+        help="Probability that the SPRT accepts H0 when H1 is true."
+    )
+    parser.add_argument(
+        '--batch', type=int, default=SPRT_BATCH,
+        help="Number of rounds to play between each SPRT check."
+    )
     args = parser.parse_args()
 
     logging.basicConfig(filename="matches.log", filemode="w", level=logging.DEBUG)
     logging.info(
         "Search Configuration:\n" +
+        "Custom Agent: {}\n".format(args.custom) +
         "Opponent: {}\n".format(args.opponent) +
         "Rounds: {}\n".format(args.rounds) +
         "Fair Matches: {}\n".format(args.fair_matches) +
         "Time Limit: {}\n".format(args.time_limit) +
         "Processes: {}\n".format(args.processes) +
+        "Persistent Workers: {}\n".format(args.persistent) +
+        "SPRT: {}\n".format(
+            "elo0={} elo1={} alpha={} beta={}".format(args.elo0, args.elo1, args.alpha, args.beta)
+            if args.sprt else False) +
         "Debug Mode: {}".format(args.debug)
     )
 
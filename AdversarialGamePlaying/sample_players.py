@@ -14,6 +14,7 @@ class BasePlayer:
         self.timer = None
         self.queue = None
         self.context = None
+        self.telemetry = None  # dict of search statistics reported with each put()
         self.data = None
 
     def get_action(self, state):
@@ -30,10 +31,25 @@ class DataPlayer(BasePlayer):
         try:
             with open("data.pickle", "rb") as f:
                 self.data = pickle.load(f)
-        except (IOError, TypeError) as e:
+        except (IOError, EOFError, TypeError, ValueError, pickle.UnpicklingError) as e:
             logger.info(str(e))
             self.data = None
 
+    def probe_book(self, state):
+        """ Return the opening book move for the state, or None if the state
+        is not in the book (see opening_book.py)
+
+        The book only stores the canonical image of each position, so the
+        move is mapped back through the symmetry that produced the image.
+        """
+        if not isinstance(self.data, dict):
+            return None
+        canonical, symmetry = state.canonical()
+        action = self.data.get(canonical.zkey)
+        if action is None:
+            return None
+        return canonical.reflect_action(action, symmetry)
+
 
 class RandomPlayer(BasePlayer):
     def get_action(self, state):
@@ -54,8 +70,7 @@ class GreedyPlayer(BasePlayer):
     """
     def score(self, state):
         own_loc = state.locs[self.player_id]
-        own_liberties = state.liberties(own_loc)
-        return len(own_liberties)
+        return state.liberty_count(own_loc)
 
     def get_action(self, state):
         """Select the move from the available legal moves with the highest
@@ -70,7 +85,7 @@ class GreedyPlayer(BasePlayer):
         self.queue.put(max(state.actions(), key=lambda x: self.score(state.result(x))))
 
 
-class MinimaxPlayer(BasePlayer):
+class MinimaxPlayer(DataPlayer):
     """ Implement an agent using any combination of techniques discussed
     in lecture (or that you find online on your own) that can beat
     sample_players.GreedyPlayer in >80% of "fair" matches (see tournament.py
@@ -100,9 +115,13 @@ class MinimaxPlayer(BasePlayer):
               See (and use!) the Isolation.play() function to run games.
         **********************************************************************
         """
-        # randomly select a move as player 1 or 2 on an empty board, otherwise
-        # return the optimal minimax move at a fixed search depth of 3 plies
-        if state.ply_count < 2:
+        # play the opening book move if there is one, randomly select a move as
+        # player 1 or 2 on an empty board, otherwise return the optimal minimax
+        # move at a fixed search depth of 3 plies
+        book_action = self.probe_book(state)
+        if book_action is not None:
+            self.queue.put(book_action)
+        elif state.ply_count < 2:
             self.queue.put(random.choice(state.actions()))
         else:
             self.queue.put(self.minimax(state, depth=3))
@@ -130,6 +149,4 @@ class MinimaxPlayer(BasePlayer):
     def score(self, state):
         own_loc = state.locs[self.player_id]
         opp_loc = state.locs[1 - self.player_id]
-        own_liberties = state.liberties(own_loc)
-        opp_liberties = state.liberties(opp_loc)
-        return len(own_liberties) - len(opp_liberties)
+        return state.liberty_count(own_loc) - state.liberty_count(opp_loc)
@@ -0,0 +1,208 @@
+""" Generate self-play training data for knight's Isolation
+
+Games between two agents are played with isolation.play() on a pool of
+worker processes, and every move is saved as a fixed-size binary record:
+
+    board       the bitboard before the move (two little-endian uint64 words)
+    loc0, loc1  the player locations before the move (-1 if not placed)
+    ply         the ply count before the move
+    action      the action chosen by the player to move
+    value       the search value that the agent reported for the move, from
+                the point of view of the player to move (NaN if none)
+    outcome     +1 if the player to move won the game, otherwise -1
+
+Records are appended to chunk files (selfplay-00000.bin, selfplay-00001.bin,
+...) in an output directory. A new chunk is started when the last one holds
+CHUNK_RECORDS records, so existing data is never rewritten, and running the
+generator again adds more games. read_records() streams the records of every
+chunk in order without loading the files into memory.
+"""
+import argparse
+import glob
+import logging
+import os
+import struct
+import textwrap
+
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from isolation import Isolation, Agent, play
+from run_match import TEST_AGENTS
+
+logger = logging.getLogger(__name__)
+
+NUM_GAMES = 100
+TIME_LIMIT = 150       # number of milliseconds for each move
+CHUNK_RECORDS = 2**16  # number of records in each chunk file
+NUM_PROCS = os.cpu_count() or 1
+
+MAGIC = b"ISOSELF1"  # header of every chunk file
+RECORD = struct.Struct("<QQhhhhfb")
+_MASK64 = (1 << 64) - 1
+
+Record = namedtuple("Record", "board loc0 loc1 ply action value outcome")
+
+
+def game_records(agents, initial_state, result):
+    """ Return the records of every move in a game (see isolation.GameResult) """
+    winner, game_history, _ = result
+    values = {r["ply"]: r.get("value") for r in result.telemetry}
+    records = []
+    state = initial_state
+    for action in game_history:
+        player = state.player()
+        value = values.get(state.ply_count)
+        records.append(Record(
+            board=state.board,
+            loc0=-1 if state.locs[0] is None else state.locs[0],
+            loc1=-1 if state.locs[1] is None else state.locs[1],
+            ply=state.ply_count,
+            action=int(action),
+            value=float("nan") if value is None else float(value),
+            outcome=1 if agents[player] == winner else -1))
+        state = state.result(action)
+    return records
+
+
+def _play_game(job):
+    agents, time_limit, game_id = job
+    initial_state = Isolation()
+    return game_records(agents, initial_state, play((agents, initial_state, time_limit, game_id)))
+
+
+class ChunkWriter:
+    """ Append records to the chunk files in a directory """
+    def __init__(self, directory, chunk_records=CHUNK_RECORDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_records = chunk_records
+        chunks = _chunk_files(directory)
+        self.index = len(chunks) - 1 if chunks else 0
+        self.file = None
+        self.count = 0
+        self._open()
+
+    def _open(self):
+        if self.file is not None:
+            self.file.close()
+        filename = os.path.join(self.directory, "selfplay-{:05d}.bin".format(self.index))
+        self.file = open(filename, "ab")
+        size = self.file.tell()
+        if size < len(MAGIC):
+            self.file.truncate(0)
+            self.file.write(MAGIC)
+            size = len(MAGIC)
+        self.count = (size - len(MAGIC)) // RECORD.size
+        # drop the partial record left by an interrupted write, so that the
+        # new records stay aligned
+        whole = len(MAGIC) + self.count * RECORD.size
+        if whole < size:
+            logger.warning("Dropping a partial record at the end of {}".format(filename))
+            self.file.truncate(whole)
+
+    def write(self, records):
+        for r in records:
+            if self.count >= self.chunk_records:
+                self.index += 1
+                self._open()
+            self.file.write(RECORD.pack(r.board & _MASK64, r.board >> 64, r.loc0, r.loc1,
+                                        r.ply, r.action, r.value, r.outcome))
+            self.count += 1
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _chunk_files(directory):
+    return sorted(glob.glob(os.path.join(directory, "selfplay-*.bin")))
+
+
+def read_records(directory, buffer_records=4096):
+    """ Yield the records of every chunk file in the directory, in order """
+    for filename in _chunk_files(directory):
+        with open(filename, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError("{} is not a self-play chunk file".format(filename))
+            while True:
+                data = f.read(RECORD.size * buffer_records)
+                # ignore a partial record at the end of a chunk that is being written
+                for fields in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+                    lo, hi, loc0, loc1, ply, action, value, outcome = fields
+                    yield Record(lo | (hi << 64), loc0, loc1, ply, action, value, outcome)
+                if len(data) < RECORD.size * buffer_records:
+                    break
+
+
+def record_state(record):
+    """ Return the Isolation state before the move of a record """
+    locs = tuple(None if loc < 0 else loc for loc in (record.loc0, record.loc1))
+    return Isolation(board=record.board, ply_count=record.ply, locs=locs)
+
+
+def generate(agents, num_games=NUM_GAMES, directory="selfplay", time_limit=TIME_LIMIT,
+             processes=NUM_PROCS, chunk_records=CHUNK_RECORDS):
+    """ Play num_games games between the agents (a pair of isolation.Agent)
+    and append their records to the chunk files in the directory
+
+    Returns
+    -------
+    int
+        The number of records written
+    """
+    jobs = [(agents, time_limit, game_id) for game_id in range(num_games)]
+    num_records = 0
+    with ChunkWriter(directory, chunk_records) as writer, ProcessPoolExecutor(processes) as executor:
+        for i, records in enumerate(executor.map(_play_game, jobs), 1):
+            writer.write(records)
+            num_records += len(records)
+            logger.info("Game {} of {}: {} moves".format(i, num_games, len(records)))
+    return num_records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description="Generate self-play training data for the isolation agents.",
+        epilog=textwrap.dedent("""\
+            Example Usage:
+            --------------
+            - Play 1000 games of the alpha-beta agent against itself on 8 processes:
+
+                $python selfplay.py -n 1000 -a ALPHABETA -p 8 -o selfplay
+        """)
+    )
+    parser.add_argument(
+        '-n', '--games', type=int, default=NUM_GAMES,
+        help="Set the number of games to play."
+    )
+    parser.add_argument(
+        '-a', '--agent', type=str, default='ALPHABETA', choices=list(TEST_AGENTS.keys()),
+        help="Choose the agent that plays both sides."
+    )
+    parser.add_argument(
+        '-o', '--output', type=str, default="selfplay",
+        help="Set the directory for the chunk files."
+    )
+    parser.add_argument(
+        '-p', '--processes', type=int, default=NUM_PROCS,
+        help="Set the number of games played in parallel."
+    )
+    parser.add_argument(
+        '-t', '--time_limit', type=int, default=TIME_LIMIT,
+        help="Set the maximum allowed time (in milliseconds) for each move."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    agent = TEST_AGENTS[args.agent.upper()]
+    agents = (Agent(agent.agent_class, agent.name + " 1"), Agent(agent.agent_class, agent.name + " 2"))
+    num_records = generate(agents, args.games, args.output, args.time_limit, args.processes)
+    print("Wrote {} records to {}".format(num_records, args.output))
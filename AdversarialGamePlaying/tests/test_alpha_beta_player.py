@@ -0,0 +1,97 @@
+
+import unittest
+
+from random import Random
+
+from isolation import Isolation
+from alpha_beta_player import AlphabetaPlayer, PvsPlayer
+from move_ordering import MoveOrderer
+from transposition_table import TranspositionTable, EXACT, LOWERBOUND
+
+
+def _minimax(state, depth, player, score):
+    """ Plain depth-limited minimax used as a reference value """
+    if state.terminal_test(): return state.utility(player)
+    if depth <= 0: return score(state)
+    values = [_minimax(state.result(a), depth - 1, player, score) for a in state.actions()]
+    return max(values) if state.player() == player else min(values)
+
+
+def _midgame_state(seed, plies=10):
+    rng = Random(seed)
+    state = Isolation()
+    for _ in range(plies):
+        state = state.result(rng.choice(state.actions()))
+    return state
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_probe_and_stats(self):
+        """ stored entries can be probed and the hit rate is tracked """
+        tt = TranspositionTable(capacity=8)
+        self.assertIsNone(tt.probe(3))
+        tt.store(3, 2, EXACT, 1.0, None)
+        self.assertEqual(tt.probe(3).value, 1.0)
+        self.assertEqual((tt.probes, tt.hits), (2, 1))
+        self.assertEqual(tt.hit_rate, 0.5)
+
+    def test_replacement_policy(self):
+        """ shallow results cannot evict a deeper entry from its slot """
+        tt = TranspositionTable(capacity=8)
+        tt.store(1, 5, EXACT, 1.0, None)
+        tt.store(9, 2, LOWERBOUND, 2.0, None)   # same slot, shallower
+        tt.store(17, 3, LOWERBOUND, 3.0, None)  # same slot, replaces key 9
+        self.assertEqual(tt.probe(1).depth, 5)
+        self.assertIsNone(tt.probe(9))
+        self.assertEqual(tt.probe(17).value, 3.0)
+        self.assertLessEqual(len(tt), 2 * tt.capacity)
+
+
+class MoveOrdererTest(unittest.TestCase):
+    def test_order(self):
+        """ the table move comes first, then killers, then moves by history """
+        state = _midgame_state(0, plies=4)
+        actions = state.actions()
+        self.assertGreaterEqual(len(actions), 4)
+        ordering = MoveOrderer()
+        ordering.record_cutoff(state, actions[1], 3, 2)
+        ordering.killers.clear()
+        ordering.record_cutoff(state, actions[2], 3, 1)
+        ordered = ordering.order(state, actions, 3, tt_move=actions[3])
+        self.assertEqual(ordered[:3], [actions[3], actions[2], actions[1]])
+        self.assertEqual(sorted(ordered), sorted(actions))
+
+
+class AlphabetaSearchTest(unittest.TestCase):
+    def _test_matches_minimax_value(self, agent_class):
+        for seed in range(3):
+            state = _midgame_state(seed)
+            if state.terminal_test(): continue
+            agent = agent_class(state.player())
+            depth = 3
+            best = max(_minimax(state.result(a), depth - 1, agent.player_id, agent.score)
+                       for a in state.actions())
+            for _ in range(2):  # the second search reuses the table from the first
+                action = agent.alphaBeta(state, depth)
+                value = _minimax(state.result(action), depth - 1, agent.player_id, agent.score)
+                self.assertEqual(value, best)
+            self.assertGreater(agent.tt.hits, 0)
+            self.assertGreater(agent.nodes, 0)
+
+    def test_alphabeta_matches_minimax_value(self):
+        """ alphaBeta() with a transposition table picks a minimax-optimal move """
+        self._test_matches_minimax_value(AlphabetaPlayer)
+
+    def test_pvs_matches_minimax_value(self):
+        """ principal variation search with aspiration windows picks a minimax-optimal move """
+        self._test_matches_minimax_value(PvsPlayer)
+
+    def test_aspiration_window_forced_result(self):
+        """ the aspiration loop stops when a deeper iteration finds a forced win or loss """
+        for board, ply_count, locs in ((28541388646554489083152921878062079, 22, (99, 75)),
+                                       (16818037196982274225693924102776605, 49, (111, 33))):
+            state = Isolation(board=board, ply_count=ply_count, locs=locs)
+            agent = PvsPlayer(state.player())
+            agent.reset_search()
+            for depth in range(1, 5):
+                self.assertIn(agent.alphaBeta(state, depth), state.actions())
@@ -0,0 +1,22 @@
+
+import unittest
+
+from benchmark import make_corpus, run_benchmarks, compare
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_corpus_is_reproducible(self):
+        """ the corpus is the same every time it is generated """
+        corpus = make_corpus(5)
+        self.assertEqual(corpus, make_corpus(5))
+        self.assertFalse(any(state.terminal_test() for state in corpus))
+
+    def test_run_and_compare(self):
+        """ a small benchmark run reports throughput that compares to itself """
+        results = run_benchmarks(corpus_size=2, depth=2, iterations=10, playouts=10)
+        self.assertEqual(set(results["results"]), {"alphabeta", "pvs", "mcts", "playouts"})
+        self.assertEqual(set(results["results"]["alphabeta"]["seconds_to_depth"]), {"1", "2"})
+        self.assertGreater(results["results"]["mcts"]["playouts_per_sec"], 0)
+        changes = compare(results, results)
+        self.assertIn("alphabeta.nodes_per_sec", changes)
+        self.assertTrue(all(change == 0 for change in changes.values()))
@@ -0,0 +1,60 @@
+
+import unittest
+
+from random import Random
+
+from isolation import Isolation
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _reference_features(state, player_id):
+    """ Features computed one state at a time with the Isolation methods """
+    def player(loc):
+        if loc is None: return [0, 0, 0]
+        first = state.liberties(loc)
+        second = set(c for f in first for c in state.liberties(f))
+        x, y = loc % 13, loc // 13
+        return [len(first), len(second), -((x - 5) ** 2 + (y - 4) ** 2)]
+    return player(state.locs[player_id]) + player(state.locs[1 - player_id])
+
+
+@unittest.skipIf(np is None, "NumPy is not installed")
+class BatchEvaluationTest(unittest.TestCase):
+    def setUp(self):
+        rng = Random(0)
+        self.states = []
+        for _ in range(10):
+            state = Isolation()
+            while not state.terminal_test():
+                self.states.append(state)
+                state = state.result(rng.choice(state.actions()))
+
+    def test_features_match_reference(self):
+        """ batch features equal the features computed state by state """
+        from evaluation import to_arrays, features
+        lo, hi, loc0, loc1 = to_arrays(self.states)
+        for player_id, (own, opp) in enumerate([(loc0, loc1), (loc1, loc0)]):
+            X = features(lo, hi, own, opp)
+            for state, row in zip(self.states, X):
+                self.assertEqual(list(row), _reference_features(state, player_id))
+
+    def test_default_weights_match_liberty_heuristic(self):
+        """ the default weights reproduce the agents' liberty-difference score """
+        from evaluation import evaluate_children
+        from alpha_beta_player import AlphabetaPlayer
+        state = self.states[5]
+        agent = AlphabetaPlayer(state.player())
+        actions, scores = evaluate_children(state, agent.player_id)
+        self.assertEqual(list(scores), [agent.score(state.result(a)) for a in actions])
+
+    def test_fit_weights(self):
+        """ least squares recovers the weights of a linear target """
+        from evaluation import to_arrays, features, fit_weights
+        lo, hi, loc0, loc1 = to_arrays(self.states)
+        X = features(lo, hi, loc0, loc1)
+        weights = np.array([1., 0.5, 0.1, -1., -0.5, -0.1])
+        np.testing.assert_allclose(fit_weights(X, X @ weights), weights, atol=1e-6)
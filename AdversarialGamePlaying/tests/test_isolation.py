@@ -0,0 +1,250 @@
+
+import unittest
+
+from random import Random
+
+from isolation import Isolation, Symmetry, Agent, AgentWorker, play
+from isolation.isolation import Action, _SIZE
+
+
+def _random_states(seed, num_games=20):
+    """ Yield every state visited by a handful of seeded random games """
+    rng = Random(seed)
+    for _ in range(num_games):
+        state = Isolation()
+        yield state
+        while not state.terminal_test():
+            state = state.result(rng.choice(state.actions()))
+            yield state
+
+
+class _CountingPlayer:
+    """ Random agent that counts its turns in an attribute (not the context) """
+    def __init__(self, player_id):
+        self.player_id = player_id
+        self.context = None
+        self.turns = 0
+
+    def get_action(self, state):
+        self.turns += 1
+        self.queue.put((Random(state.zkey).choice(state.actions()), self.turns))
+
+
+class MoveMaskTest(unittest.TestCase):
+    def _reference_liberties(self, state, loc):
+        cells = range(_SIZE) if loc is None else (loc + a for a in Action)
+        return [c for c in cells if c >= 0 and state.board & (1 << c)]
+
+    def test_liberties_match_reference(self):
+        """ liberties() from the precomputed tables matches the offset walk """
+        for state in _random_states(0):
+            for loc in state.locs:
+                self.assertEqual(state.liberties(loc), self._reference_liberties(state, loc))
+
+    def test_liberty_count(self):
+        """ liberty_count() agrees with the length of liberties() """
+        for state in _random_states(1):
+            for loc in state.locs:
+                self.assertEqual(state.liberty_count(loc), len(state.liberties(loc)))
+
+    def test_actions_mask(self):
+        """ actions_mask() has one bit set per legal action destination """
+        for state in _random_states(2):
+            loc = state.locs[state.player()]
+            expected = 0
+            for action in state.actions():
+                expected |= 1 << (action if loc is None else loc + action)
+            self.assertEqual(state.actions_mask(), expected)
+
+
+class ZobristTest(unittest.TestCase):
+    def test_incremental_key_matches_full_key(self):
+        """ the key updated by result() equals the key computed from scratch """
+        for state in _random_states(3):
+            fresh = Isolation(state.board, state.ply_count, state.locs)
+            self.assertEqual(state.zkey, fresh.zkey)
+            self.assertEqual(hash(state), state.zkey)
+
+    def test_equal_states_share_a_key(self):
+        """ equal states have equal keys and can replace each other as dict keys """
+        a = Isolation().result(57).result(42).result(Action.NNE).result(Action.SSW)
+        b = Isolation(a.board, a.ply_count, a.locs)
+        self.assertEqual(a.zkey, b.zkey)
+        self.assertEqual({a: 1}[b], 1)
+        self.assertNotEqual(Isolation().result(57).zkey, Isolation().result(42).zkey)
+
+    def test_pickle_preserves_key(self):
+        """ states keep their key through a pickle round trip """
+        import pickle
+        state = Isolation().result(57).result(42)
+        clone = pickle.loads(pickle.dumps(state))
+        self.assertEqual(clone, state)
+        self.assertEqual(clone.zkey, state.zkey)
+
+
+class SymmetryTest(unittest.TestCase):
+    def test_reflect_board_matches_cells(self):
+        """ reflecting the bitboard moves every cell to its reflected index """
+        from isolation.isolation import reflect_board, reflect_cell, _BLANK_BOARD
+        for symmetry in Symmetry:
+            self.assertEqual(reflect_board(_BLANK_BOARD, symmetry), _BLANK_BOARD)
+            for loc in range(_SIZE):
+                if _BLANK_BOARD & (1 << loc):
+                    self.assertEqual(reflect_board(1 << loc, symmetry), 1 << reflect_cell(loc, symmetry))
+
+    def test_reflections_commute_with_actions(self):
+        """ applying the reflected action to the reflected state gives the
+        reflection of the result
+        """
+        for state in _random_states(5, num_games=2):
+            for symmetry in Symmetry:
+                image = state.reflect(symmetry)
+                self.assertEqual(image.reflect(symmetry), state)
+                self.assertEqual(image.terminal_test(), state.terminal_test())
+                self.assertEqual(sorted(state.reflect_action(a, symmetry) for a in state.actions()),
+                                 sorted(image.actions()))
+                for action in state.actions():
+                    self.assertEqual(image.result(state.reflect_action(action, symmetry)),
+                                     state.result(action).reflect(symmetry))
+
+    def test_canonical(self):
+        """ every reflection of a state has the same canonical representative """
+        for state in _random_states(6, num_games=2):
+            canonical, symmetry = state.canonical()
+            self.assertEqual(canonical.reflect(symmetry), state)
+            for image in (state.reflect(s) for s in Symmetry):
+                self.assertEqual(image.canonical()[0], canonical)
+                self.assertEqual(image.canonical()[0].zkey, canonical.zkey)
+
+
+def _winner(state, cache):
+    """ Exhaustive game-tree solution: the id of the winning player """
+    if state not in cache:
+        if state.terminal_test():
+            cache[state] = 0 if state.utility(0) > 0 else 1
+        else:
+            player = state.player()
+            winners = [_winner(state.result(a), cache) for a in state.actions()]
+            cache[state] = player if player in winners else 1 - player
+    return cache[state]
+
+
+class EndgameTest(unittest.TestCase):
+    def test_longest_path(self):
+        """ longest_path() finds the longest knight's tour over open cells """
+        from isolation.endgame import longest_path
+        # four cells, each a knight's move from the last (and the first)
+        chain = [57, 57 + Action.NNE, 57 + Action.NNE + Action.WNW,
+                 57 + Action.NNE + Action.WNW + Action.SSW]
+        board = sum(1 << c for c in chain[1:])
+        self.assertEqual(longest_path(board, chain[0]), 3)
+        self.assertEqual(longest_path(board ^ (1 << chain[2]), chain[2]), 1)
+        self.assertEqual(longest_path(0, chain[0]), 0)
+
+    def test_solve_matches_game_tree(self):
+        """ solve() agrees with an exhaustive search of separated positions """
+        from isolation.endgame import solve, is_partitioned
+        cache, solved = {}, 0
+        for state in _random_states(7, num_games=100):
+            if state.terminal_test() or not is_partitioned(state): continue
+            solution = solve(state)
+            if solution is None or bin(state.board).count("1") > 30: continue
+            winner, action = solution
+            self.assertEqual(winner, _winner(state, cache))
+            if winner == state.player():
+                self.assertEqual(_winner(state.result(action), cache), winner)
+            solved += 1
+        self.assertGreater(solved, 0)
+
+
+class PlayoutTest(unittest.TestCase):
+    def test_playout_reaches_a_terminal_state(self):
+        """ random_playout() reports the same winner as a game played with the
+        same random moves on Isolation states
+        """
+        from isolation import random_playout
+        for state in _random_states(4, num_games=3):
+            rng = Random(state.zkey)
+            winner = random_playout(state.board, state.locs[0], state.locs[1],
+                                    state.ply_count, rng.random)
+            rng = Random(state.zkey)
+            while not state.terminal_test():
+                actions = state.actions()
+                state = state.result(actions[int(rng.random() * len(actions))])
+            self.assertEqual(state.utility(winner), float("inf"))
+
+    def test_random_playouts(self):
+        """ random_playouts() counts wins for the active player """
+        from isolation import random_playouts
+        state = Isolation().result(57).result(42)
+        wins = random_playouts(state.board, state.locs[0], state.locs[1], state.ply_count, 50)
+        self.assertTrue(0 <= wins <= 50)
+
+
+class _LatePlayer(_CountingPlayer):
+    """ Agent whose first put() comes after the time limit """
+    def get_action(self, state):
+        import time
+        time.sleep(0.1)
+        self.queue.put(state.actions()[0])
+
+
+class ForkGetActionTest(unittest.TestCase):
+    def test_late_agent_raises_empty(self):
+        """ fork_get_action() raises Empty instead of blocking when the agent
+        never put an action before the time limit
+        """
+        from queue import Empty
+        from isolation import fork_get_action
+        with self.assertRaises(Empty):
+            fork_get_action(Isolation(), _LatePlayer(0), 20)
+
+
+class AgentWorkerTest(unittest.TestCase):
+    def test_worker_keeps_agent_between_turns(self):
+        """ an AgentWorker serves every turn from the same agent process """
+        worker = AgentWorker(_CountingPlayer(0))
+        try:
+            state = Isolation()
+            for turn in range(1, 4):
+                action, count = worker.get_action(state, 50)
+                self.assertIn(action, state.actions())
+                self.assertEqual(count, turn)
+                state = state.result(action).result(state.result(action).actions()[0])
+        finally:
+            worker.stop()
+        self.assertIsNone(worker.process)
+
+    def test_persistent_game(self):
+        """ play() completes a valid game with persistent agent workers """
+        from sample_players import RandomPlayer, GreedyPlayer
+        agents = (Agent(RandomPlayer, "Random"), Agent(GreedyPlayer, "Greedy"))
+        winner, history, _ = play((agents, Isolation(), 50, 0, False, True))
+        state = Isolation()
+        for action in history:
+            self.assertIn(action, state.actions())
+            state = state.result(action)
+        self.assertTrue(state.terminal_test())
+        self.assertEqual(state.utility(agents.index(winner)), float("inf"))
+
+
+class TelemetryTest(unittest.TestCase):
+    def test_game_telemetry(self):
+        """ play() returns one telemetry record per move with the statistics
+        reported by the agents
+        """
+        from alpha_beta_player import AlphabetaPlayer
+        from sample_players import GreedyPlayer
+        agents = (Agent(GreedyPlayer, "Greedy"), Agent(AlphabetaPlayer, "Alphabeta"))
+        result = play((agents, Isolation(), 50, 0))
+        winner, history, _ = result
+        self.assertEqual(len(result.telemetry), len(history))
+        for ply, record in enumerate(result.telemetry):
+            self.assertEqual(record["ply"], ply)
+            self.assertEqual(record["agent"], agents[ply % 2].name)
+            self.assertFalse(record["timeout"])
+            self.assertGreaterEqual(record["time"], 0)
+        searches = [r for r in result.telemetry
+                    if r["agent"] == "Alphabeta" and r["ply"] >= 2 and "endgame" not in r]
+        self.assertTrue(searches)
+        self.assertTrue(all(r["depth"] >= 5 and r["nodes"] > 0 for r in searches))
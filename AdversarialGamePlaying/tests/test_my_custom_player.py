@@ -67,3 +67,104 @@ class CustomPlayerPlayTest(BaseCustomPlayerTest):
                        
             raise Exception("Your agent did not play until a terminal state.")
 
+
+
+class CountdownQueue:
+    """ Stand-in for isolation.TimedQueue that stops the search after a fixed
+    number of calls to put() instead of a time limit
+    """
+    def __init__(self, agent, num_puts):
+        self.agent, self.num_puts, self.items = agent, num_puts, []
+
+    def put(self, item):
+        from isolation import StopSearch
+        if len(self.items) >= self.num_puts: raise StopSearch
+        self.items.append((self.agent.context, item))
+
+
+class CustomPlayerTreeReuseTest(BaseCustomPlayerTest):
+    def _search(self, agent, state, num_puts):
+        from isolation import StopSearch
+        agent.queue = CountdownQueue(agent, num_puts)
+        try:
+            agent.get_action(state)
+        except StopSearch:
+            pass
+        agent.context, action = agent.queue.items[-1]
+        return action
+
+    def test_tree_reuse(self):
+        """ statistics for the opponent's reply survive into the next turn """
+        agent = CustomPlayer(self.move_2_state.player())
+        action = self._search(agent, self.move_2_state, 200)
+        self.assertIn(action, self.move_2_state.actions())
+
+        state = self.move_2_state.result(action)
+        replies = [(agent.restoreTree(state.result(a)).visits[0], a) for a in state.actions()]
+        visits, reply = max(replies)
+        self.assertGreater(visits, 0, "no statistics were saved for the next turn")
+
+        next_state = state.result(reply)
+        tree = agent.restoreTree(next_state)
+        for v in tree.children(0):
+            self.assertIn(tree.action[v], next_state.actions())
+        self.assertIn(self._search(agent, next_state, 2), next_state.actions())
+
+
+class ParallelCustomPlayerTest(BaseCustomPlayerTest):
+    def _test_parallel(self, agent_class):
+        state = self.move_2_state
+        agent = agent_class(state.player())
+        action = fork_get_action(state, agent, self.time_limit)
+        self.assertIn(action, state.actions())
+
+    def test_root_parallel(self):
+        """ root-parallel MCTS calls self.queue.put() with a valid action before timeout """
+        from my_custom_player import RootParallelPlayer
+        self._test_parallel(RootParallelPlayer)
+
+    def test_leaf_parallel(self):
+        """ leaf-parallel MCTS calls self.queue.put() with a valid action before timeout """
+        from my_custom_player import LeafParallelPlayer
+        self._test_parallel(LeafParallelPlayer)
+
+    def test_pool_reused_between_turns(self):
+        """ the worker pool is started once and kept by the agent, but never pickled """
+        import pickle
+        from isolation import StopSearch
+        from my_custom_player import LeafParallelPlayer
+        state = self.move_2_state
+        agent = LeafParallelPlayer(state.player())
+        pools = []
+        try:
+            for _ in range(2):
+                agent.queue = CountdownQueue(agent, 1)
+                try:
+                    agent.get_action(state)
+                except StopSearch:
+                    pass
+                pools.append(agent._pool)
+            self.assertIsNotNone(pools[0])
+            self.assertIs(pools[0], pools[1])
+            agent.queue = None
+            self.assertIsNone(pickle.loads(pickle.dumps(agent))._pool)
+        finally:
+            agent._pool.terminate()
+
+    def test_leaf_snapshot_near_deadline(self):
+        """ leaf-parallel MCTS saves a new snapshot with every batch once the deadline is close """
+        from isolation import StopSearch
+        from my_custom_player import LeafParallelPlayer
+        state = self.move_2_state
+        agent = LeafParallelPlayer(state.player())
+        agent.queue = CountdownQueue(agent, 3)
+        agent.queue.remaining = lambda: 0.
+        try:
+            agent.get_action(state)
+        except StopSearch:
+            pass
+        finally:
+            agent._pool.terminate()
+        contexts = [context for context, _ in agent.queue.items]
+        self.assertEqual(len(contexts), 3)
+        self.assertEqual(len(set(contexts)), 3)
@@ -0,0 +1,65 @@
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from queue import Queue
+
+from isolation import Isolation
+from alpha_beta_player import AlphabetaPlayer
+from my_custom_player import CustomPlayer
+from opening_book import build_book, book_positions, _load
+from sample_players import MinimaxPlayer
+
+
+class OpeningBookTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tmpdir.name, "book.pickle")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_book_covers_reflections(self):
+        """ the book has a legal move for every reflection of every position """
+        book = build_book(plies=2, depth=1, seconds=0, filename=self.filename, processes=2)
+        with open(self.filename, "rb") as f:
+            self.assertEqual(pickle.load(f), book)
+        self.assertFalse(os.path.exists(self.filename + ".partial"))
+        self.assertEqual(len(book), len(book_positions(2)))
+
+        agent = AlphabetaPlayer(0)
+        agent.data = book
+        states = [Isolation()] + [Isolation().result(a) for a in Isolation().actions()]
+        for state in states:
+            self.assertIn(agent.probe_book(state), state.actions())
+        self.assertIsNone(agent.probe_book(states[1].result(states[1].actions()[0])))
+
+    def test_resume_from_checkpoint(self):
+        """ positions saved in the checkpoint are not searched again """
+        positions = book_positions(1)
+        with open(self.filename + ".partial", "wb") as f:
+            pickle.dump({positions[0].zkey: 57}, f)
+        book = build_book(plies=1, depth=1, seconds=0, filename=self.filename, processes=1)
+        self.assertEqual(book, {Isolation().zkey: 57})
+
+    def test_load_corrupt_file(self):
+        """ a truncated or corrupt book file loads as an empty book """
+        for data in (b"", b"not a pickle", pickle.dumps({1: 2})[:-3]):
+            with open(self.filename, "wb") as f:
+                f.write(data)
+            self.assertEqual(_load(self.filename), {})
+
+    def test_agents_play_book_moves(self):
+        """ every agent that loads the book plays the book move """
+        state = Isolation()
+        canonical, symmetry = state.canonical()
+        action = canonical.actions()[7]
+        for agent_class in (AlphabetaPlayer, CustomPlayer, MinimaxPlayer):
+            agent = agent_class(0)
+            agent.data = {canonical.zkey: action}
+            agent.queue = Queue()
+            agent.get_action(state)
+            self.assertEqual(agent.queue.qsize(), 1)
+            self.assertEqual(agent.queue.get(), canonical.reflect_action(action, symmetry))
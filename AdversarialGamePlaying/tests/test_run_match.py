@@ -0,0 +1,54 @@
+
+import math
+import unittest
+
+from run_match import TEST_AGENTS, elo_difference, match_processes, sprt_llr, sprt_bounds
+from my_custom_player import NUM_WORKERS
+
+
+class EloTest(unittest.TestCase):
+    def test_elo_difference(self):
+        """ an even score is 0 Elo, and a 76% score is about +200 Elo """
+        elo, low, high = elo_difference(50, 100)
+        self.assertAlmostEqual(elo, 0)
+        self.assertAlmostEqual(low, -high)
+        self.assertLess(low, 0)
+        self.assertAlmostEqual(elo_difference(76, 100)[0], 200, delta=1)
+        self.assertEqual(elo_difference(10, 10)[0], float("inf"))
+
+    def test_elo_interval_bounds(self):
+        """ a 0% or 100% score has one infinite and one finite bound for every number of games """
+        inf = float("inf")
+        for num_games in range(1, 201):
+            elo, low, high = elo_difference(num_games, num_games)
+            self.assertEqual((elo, high), (inf, inf))
+            self.assertTrue(math.isfinite(low))
+            self.assertGreater(low, 0 if num_games >= 5 else -inf)
+            elo, low, high = elo_difference(0, num_games)
+            self.assertEqual((elo, low), (-inf, -inf))
+            self.assertTrue(math.isfinite(high))
+            self.assertLess(high, 0 if num_games >= 5 else inf)
+
+
+class SprtTest(unittest.TestCase):
+    def test_llr(self):
+        """ wins support H1 and losses support H0 """
+        self.assertGreater(sprt_llr(10, 0, 0, 50), 0)
+        self.assertLess(sprt_llr(0, 10, 0, 50), 0)
+        self.assertAlmostEqual(sprt_llr(0, 0, 0, 50), 0)
+
+    def test_bounds(self):
+        """ symmetric error rates give symmetric bounds """
+        lower, upper = sprt_bounds(0.05, 0.05)
+        self.assertAlmostEqual(upper, math.log(19))
+        self.assertAlmostEqual(lower, -upper)
+
+
+class MatchProcessesTest(unittest.TestCase):
+    def test_match_processes(self):
+        """ the games share the processes with the worker pools of the parallel agents """
+        agents = (TEST_AGENTS["ALPHABETA"], TEST_AGENTS["GREEDY"])
+        self.assertEqual(match_processes(8, agents), 8)
+        agents = (TEST_AGENTS["ROOT_MCTS"], TEST_AGENTS["LEAF_MCTS"])
+        self.assertEqual(match_processes(8, agents), max(1, 8 // (2 * NUM_WORKERS)))
+        self.assertEqual(match_processes(1, agents), 1)
@@ -0,0 +1,59 @@
+
+import math
+import os
+import tempfile
+import unittest
+
+from isolation import Agent
+from sample_players import RandomPlayer
+from alpha_beta_player import AlphabetaPlayer
+from selfplay import ChunkWriter, MAGIC, Record, RECORD, generate, read_records, record_state, _chunk_files
+
+
+class SelfPlayTest(unittest.TestCase):
+    def test_generate_and_read(self):
+        """ self-play games are written to chunk files and read back in order """
+        agents = (Agent(AlphabetaPlayer, "Alphabeta"), Agent(RandomPlayer, "Random"))
+        with tempfile.TemporaryDirectory() as directory:
+            num_records = generate(agents, num_games=2, directory=directory, time_limit=100,
+                                   processes=2, chunk_records=16)
+            records = list(read_records(directory, buffer_records=5))
+            self.assertEqual(len(records), num_records)
+            self.assertGreater(len(_chunk_files(directory)), 1)
+
+            num_records += generate(agents, num_games=1, directory=directory, time_limit=100,
+                                    processes=1, chunk_records=16)
+            records = list(read_records(directory))
+            self.assertEqual(len(records), num_records)
+
+        games = 0
+        for i, record in enumerate(records):
+            state = record_state(record)
+            self.assertIn(record.action, state.actions())
+            if record.ply == 0:
+                games += 1
+                outcome = record.outcome
+            # outcomes alternate between the players of a game
+            self.assertEqual(record.outcome, outcome if record.ply % 2 == 0 else -outcome)
+            if i + 1 < len(records) and records[i + 1].ply > 0:
+                self.assertEqual(record_state(records[i + 1]), state.result(record.action))
+            searched = record.ply % 2 == 0 and record.ply >= 2
+            self.assertEqual(math.isnan(record.value), not searched)
+        self.assertEqual(games, 3)
+
+    def test_append_after_partial_record(self):
+        """ a partial record left by a crash is dropped before new records are appended """
+        records = [Record(board=i, loc0=-1, loc1=-1, ply=0, action=i, value=0., outcome=1)
+                   for i in range(3)]
+        with tempfile.TemporaryDirectory() as directory:
+            with ChunkWriter(directory) as writer:
+                writer.write(records[:2])
+            filename = _chunk_files(directory)[0]
+            with open(filename, "ab") as f:
+                f.write(b"\0" * (RECORD.size // 2))
+            with ChunkWriter(directory) as writer:
+                self.assertEqual(writer.count, 2)
+                writer.write(records[2:])
+            self.assertEqual(list(read_records(directory)), records)
+            self.assertEqual(os.path.getsize(filename) % RECORD.size,
+                             len(MAGIC) % RECORD.size)
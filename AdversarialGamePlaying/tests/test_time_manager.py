@@ -0,0 +1,71 @@
+
+import unittest
+
+from random import Random
+
+from isolation import Isolation, TimedQueue
+from alpha_beta_player import AlphabetaPlayer
+from time_manager import TimeManager, DEFAULT_BRANCHING
+
+
+class _Budget:
+    """ Stand-in for TimedQueue.remaining that returns a fixed number of seconds """
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self):
+        return self.seconds
+
+
+class _BudgetQueue:
+    """ Stand-in for isolation.TimedQueue with a fixed remaining time """
+    def __init__(self, seconds):
+        self.items = []
+        self.remaining = _Budget(seconds)
+
+    def put(self, item):
+        self.items.append(item)
+
+
+class TimeManagerTest(unittest.TestCase):
+    def _manager(self, seconds, times, nodes):
+        manager = TimeManager(_Budget(seconds))
+        manager.times, manager.nodes = list(times), list(nodes)
+        return manager
+
+    def test_predict(self):
+        """ the next iteration costs the last one times the branching factor """
+        self.assertEqual(TimeManager(_Budget(1.)).predict(), 0.)
+        self.assertEqual(self._manager(1., [.01], [100]).predict(), .01 * DEFAULT_BRANCHING)
+        manager = self._manager(1., [.01, .03], [100, 300])
+        self.assertAlmostEqual(manager.branching_factor(), 3.)
+        self.assertAlmostEqual(manager.predict(), .09)
+        self.assertEqual(self._manager(1., [.01, .01], [300, 100]).branching_factor(), 1.)
+
+    def test_should_continue(self):
+        """ iterations that cannot finish are skipped; critical positions get the whole budget """
+        manager = self._manager(.2, [.01, .06], [100, 300])  # predicts .18 seconds
+        self.assertFalse(manager.should_continue())
+        self.assertTrue(manager.should_continue(critical=True))
+        manager.remaining = _Budget(.1)
+        self.assertFalse(manager.should_continue(critical=True))
+
+    def test_timed_queue_remaining(self):
+        """ TimedQueue reports the full limit before its timer starts """
+        queue = TimedQueue(None, None, 150)
+        self.assertEqual(queue.remaining(), .15)
+        queue.start_timer()
+        self.assertLessEqual(queue.remaining(), .15)
+        self.assertGreater(queue.remaining(), 0)
+
+    def test_alphabeta_returns_before_time_limit(self):
+        """ get_action returns on its own instead of waiting for StopSearch """
+        rng = Random(3)
+        state = Isolation()
+        for _ in range(6):
+            state = state.result(rng.choice(state.actions()))
+        agent = AlphabetaPlayer(state.player())
+        agent.queue = _BudgetQueue(0.)
+        agent.get_action(state)
+        self.assertEqual(len(agent.queue.items), 1)
+        self.assertIn(agent.queue.items[0], state.actions())
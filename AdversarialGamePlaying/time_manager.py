@@ -0,0 +1,70 @@
+import time
+
+SAFETY_MARGIN = 0.01       # seconds kept in reserve to send the last action
+CALM_FRACTION = 0.5        # share of the remaining time a calm position may spend on one iteration
+DEFAULT_BRANCHING = 4.0    # branching factor assumed until two iterations have been measured
+
+
+class TimeManager:
+    """ Time control for iterative deepening search
+
+    The cost of the next iteration is predicted from the duration of the
+    last iteration and the effective branching factor (the ratio between the
+    node counts of the last two iterations), and an iteration is only started
+    if it is predicted to finish before the time limit -- otherwise the work
+    would be thrown away when TimedQueue raises StopSearch.
+
+    In calm positions an iteration must also fit in CALM_FRACTION of the
+    remaining time, because the prediction can underestimate the cost. In
+    critical positions (see `should_continue`) the whole budget is used.
+
+    Parameters
+    ----------
+    remaining : callable
+        Returns the number of seconds left before the time limit (e.g.,
+        TimedQueue.remaining)
+
+    Attributes
+    ----------
+    times, nodes : list
+        The duration (in seconds) and node count of each completed iteration
+    """
+    def __init__(self, remaining):
+        self.remaining = remaining
+        self.times = []
+        self.nodes = []
+        self._start = None
+
+    def start_iteration(self):
+        self._start = time.perf_counter()
+
+    def finish_iteration(self, nodes):
+        self.times.append(time.perf_counter() - self._start)
+        self.nodes.append(nodes)
+
+    def branching_factor(self):
+        """ Return the ratio between the node counts of the last two iterations """
+        if len(self.nodes) < 2 or not self.nodes[-2]:
+            return DEFAULT_BRANCHING
+        return max(1.0, self.nodes[-1] / self.nodes[-2])
+
+    def predict(self):
+        """ Return the predicted duration of the next iteration, in seconds """
+        if not self.times:
+            return 0.
+        return self.times[-1] * self.branching_factor()
+
+    def should_continue(self, critical=False):
+        """ Return True if the next iteration is predicted to finish in time
+
+        Parameters
+        ----------
+        critical : bool
+            True if the position deserves the whole time budget, e.g., if the
+            best move changed in the last iteration or the agent has very few
+            moves left
+        """
+        budget = self.remaining() - SAFETY_MARGIN
+        if not critical:
+            budget *= CALM_FRACTION
+        return self.predict() < budget
@@ -0,0 +1,86 @@
+from collections import namedtuple
+
+# bound types describing how a stored value relates to the true minimax value
+EXACT, LOWERBOUND, UPPERBOUND = 0, 1, 2
+
+Entry = namedtuple("Entry", "key depth flag value move")
+
+
+class TranspositionTable:
+    """ Fixed-capacity transposition table with a two-tier replacement policy
+
+    Each slot holds two entries: a depth-preferred entry that is only replaced
+    by a search of equal or greater depth, and an always-replace entry that
+    holds the most recent result that did not qualify for the first tier.
+    Keys are the Zobrist keys of the states (`Isolation.zkey`).
+
+    Attributes
+    ----------
+    capacity : int
+        The number of slots in the table (the table holds at most twice as
+        many entries)
+
+    probes, hits, stores : int
+        Counters for the number of lookups, successful lookups, and writes
+        since the table was created (or since the last call to clear_stats())
+    """
+    def __init__(self, capacity=2**16):
+        self.capacity = capacity
+        self._deep = [None] * capacity
+        self._recent = [None] * capacity
+        self.clear_stats()
+
+    def __len__(self):
+        return sum(e is not None for e in self._deep) + sum(e is not None for e in self._recent)
+
+    def __repr__(self):
+        return "TranspositionTable(probes={}, hits={}, hit_rate={:.1%}, stores={})".format(
+            self.probes, self.hits, self.hit_rate, self.stores)
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.
+
+    def clear_stats(self):
+        self.probes = self.hits = self.stores = 0
+
+    def probe(self, key):
+        """ Return the entry stored for the key, or None if there is no entry """
+        self.probes += 1
+        idx = key % self.capacity
+        entry = self._deep[idx]
+        if entry is None or entry.key != key:
+            entry = self._recent[idx]
+            if entry is None or entry.key != key:
+                return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, flag, value, move):
+        """ Record the result of searching a state to the given depth
+
+        Parameters
+        ----------
+        key : int
+            Zobrist key of the state
+
+        depth : int
+            Remaining search depth below the state
+
+        flag : int
+            One of EXACT, LOWERBOUND or UPPERBOUND
+
+        value : float
+            The value returned by the search
+
+        move : Action
+            The best move found from the state (may be None)
+        """
+        self.stores += 1
+        idx = key % self.capacity
+        entry = Entry(key, depth, flag, value, move)
+        deep = self._deep[idx]
+        if deep is None or deep.key == key or depth >= deep.depth:
+            self._deep[idx] = entry
+        else:
+            self._recent[idx] = entry
@@ -1,9 +1,15 @@
+from bitboard import BitboardState
 
-def alpha_beta_search(gameState):
+def alpha_beta_search(gameState, bitboard=False):
     """ Return the move along a branch of the game tree that 
     has the best possible value. A move is a pair of (column, row) 
     order corresponding to a legal move for the searching player.
+
+    Set bitboard=True to search a copy-free bitboard.BitboardState copy of
+    the state (gamestate.call_counter does not count its nodes)
     """
+    if bitboard and not isinstance(gameState, BitboardState):
+        gameState = BitboardState.from_state(gameState)
     alpha = float("-inf")
     beta = float("inf")
     best_score = float("-inf")
@@ -0,0 +1,208 @@
+
+# Bit-packed GameState for the mini-Isolation game
+
+# The same API as gamestate.GameState, but the board is a single integer
+# with one bit per cell (cell (x, y) is bit x * ylim + y, and a set bit is an
+# open cell), so result() builds a new state from a few integers instead of
+# calling deepcopy(), and liberties() uses precomputed ray masks instead of
+# walking the board in Python loops.
+
+# States are immutable and hashable, and can be used directly as keys in a
+# transposition table or an opening book. Unlike gamestate.GameState, there is
+# no call_counter global: solver.Solver reports the nodes of each search in
+# its SearchStats.
+
+MOVES = [(1, 0), (1, -1), (0, -1), (-1, -1),
+         (-1, 0), (-1, 1), (0, 1), (1, 1)]
+
+_GEOMETRY = {}  # (xlim, ylim) -> _Geometry
+
+
+class _Geometry:
+    """ Precomputed masks for a board size
+
+    Attributes
+    ----------
+    rays: list(list(tuple))
+        rays[loc] holds (mask, positive, cells) for each direction in MOVES
+        that leaves loc, where mask has a bit for every cell on the ray,
+        positive is True if the cell indices increase along the ray, and
+        cells lists the (x, y) coordinates of the ray in order of distance
+
+    neighbors: list(int)
+        neighbors[loc] is a mask of the cells next to loc in any direction
+
+    cells: list(tuple)
+        (bit, (x, y)) for every cell, in the order of
+        GameState._get_blank_spaces()
+    """
+    def __init__(self, xlim, ylim):
+        self.full = (1 << (xlim * ylim)) - 1
+        self.rays = []
+        self.neighbors = []
+        for x in range(xlim):
+            for y in range(ylim):
+                rays, neighbors = [], 0
+                for dx, dy in MOVES:
+                    _x, _y = x + dx, y + dy
+                    mask, cells = 0, []
+                    while 0 <= _x < xlim and 0 <= _y < ylim:
+                        mask |= 1 << (_x * ylim + _y)
+                        cells.append((_x, _y))
+                        _x, _y = _x + dx, _y + dy
+                    if cells:
+                        rays.append((mask, dx * ylim + dy > 0, tuple(cells)))
+                        neighbors |= 1 << (cells[0][0] * ylim + cells[0][1])
+                self.rays.append(rays)
+                self.neighbors.append(neighbors)
+        self.cells = [(1 << (x * ylim + y), (x, y)) for y in range(ylim) for x in range(xlim)]
+
+
+def _geometry(xlim, ylim):
+    geometry = _GEOMETRY.get((xlim, ylim))
+    if geometry is None:
+        geometry = _GEOMETRY[(xlim, ylim)] = _Geometry(xlim, ylim)
+    return geometry
+
+
+def _popcount(x):
+    return bin(x).count("1")
+
+
+class BitboardState:
+    """
+    Attributes
+    ----------
+    _board: int
+        Bitboard of the open cells, where cell (x, y) is bit
+        x * ylim + y
+
+    _player: int
+        The active player (0 or 1); also available as _parity
+
+    _player_locations: tuple
+        The current location of each player, e.g., ((0, 0), (1, 0))
+        means player 1 is at (0, 0) and player 2 is at (1, 0); players
+        that have not moved yet are at None
+    """
+    __slots__ = ("_xlim", "_ylim", "_board", "_player", "_player_locations", "_geometry")
+
+    def __init__(self, xlim=3, ylim=2, _board=None, _player=0, _player_locations=(None, None)):
+        geometry = _geometry(xlim, ylim)
+        if _board is None:  # the cell in the last row & column starts closed
+            _board = geometry.full ^ (1 << (xlim * ylim - 1))
+        _set = object.__setattr__
+        _set(self, "_xlim", xlim)
+        _set(self, "_ylim", ylim)
+        _set(self, "_geometry", geometry)
+        _set(self, "_board", _board)
+        _set(self, "_player", _player)
+        _set(self, "_player_locations", tuple(_player_locations))
+
+    @classmethod
+    def from_state(cls, state):
+        """ Return the BitboardState of a gamestate.GameState """
+        board = 0
+        for x, column in enumerate(state._board):
+            for y, closed in enumerate(column):
+                if not closed:
+                    board |= 1 << (x * state._ylim + y)
+        return cls(state._xlim, state._ylim, board, state._player, state._player_locations)
+
+    @property
+    def _parity(self):
+        return self._player
+
+    @property
+    def hashable(self):
+        """ A tuple that identifies the state (the board, the player
+        locations and the active player)
+        """
+        return (self._board, self._player_locations, self._player)
+
+    def __hash__(self):
+        return hash(self.hashable)
+
+    def __eq__(self, other):
+        return (isinstance(other, BitboardState) and (self._xlim, self._ylim) == (other._xlim, other._ylim)
+                and self.hashable == other.hashable)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BitboardState is immutable")
+
+    def __reduce__(self):
+        # __setattr__ raises, so pickle & copy rebuild the state with __init__
+        return (BitboardState, (self._xlim, self._ylim, self._board, self._player, self._player_locations))
+
+    def __repr__(self):
+        return "BitboardState(xlim={}, ylim={}, board={:#x}, player={}, locations={})".format(
+            self._xlim, self._ylim, self._board, self._player, self._player_locations)
+
+    def player(self):
+        return self._player
+
+    def actions(self):
+        """ Return a list of legal actions for the active player, as the
+        (x, y) coordinates of the destination cell
+        """
+        return self.liberties(self._player_locations[self._player])
+
+    def result(self, action):
+        """ Return a new state that results from applying the given
+        action in the current state
+        """
+        assert action in self.actions(), "Attempted to plan an illegal move"
+        locations = list(self._player_locations)
+        locations[self._player] = action
+        bit = 1 << (action[0] * self._ylim + action[1])
+        return BitboardState(self._xlim, self._ylim, self._board ^ bit, self._player ^ 1, locations)
+
+    def terminal_test(self):
+        """ return True if either player has no remaining liberties """
+        return not self._has_liberties(self._player) or not self._has_liberties(1 - self._player)
+
+    def utility(self, player_id):
+        """ return +inf if the game is terminal and the
+        specified player wins, return -inf if the game
+        is terminal and the specified player loses, and
+        return 0 if the game is not terminal
+        """
+        if not self.terminal_test(): return 0
+        player_id_is_active = (player_id == self.player())
+        player_has_liberties = self._has_liberties(self.player())
+        active_player_wins = (player_has_liberties == player_id_is_active)
+        return float("inf") if active_player_wins else float("-inf")
+
+    def liberties(self, loc):
+        """ Return a list of all open cells along any row, column or
+        diagonal from the specified location, up to the first closed
+        cell in each direction (or every open cell if loc is None)
+        """
+        if loc is None:
+            return self._get_blank_spaces()
+        board = self._board
+        moves = []
+        for mask, positive, cells in self._geometry.rays[loc[0] * self._ylim + loc[1]]:
+            blocked = mask & ~board
+            if not blocked:
+                moves.extend(cells)
+                continue
+            if positive:  # the first blocked cell is the lowest bit on the ray
+                first = blocked & -blocked
+                moves.extend(cells[:_popcount(mask & (first - 1))])
+            else:         # ... or the highest
+                first = 1 << (blocked.bit_length() - 1)
+                moves.extend(cells[:_popcount(mask & ~((first << 1) - 1))])
+        return moves
+
+    def _has_liberties(self, player_id):
+        """ Check to see if the specified player has any liberties """
+        loc = self._player_locations[player_id]
+        if loc is None:
+            return self._board != 0
+        return (self._geometry.neighbors[loc[0] * self._ylim + loc[1]] & self._board) != 0
+
+    def _get_blank_spaces(self):
+        """ Return a list of blank spaces on the board."""
+        board = self._board
+        return [cell for bit, cell in self._geometry.cells if board & bit]
@@ -2,6 +2,8 @@
 # TODO: Change the value returned when the depth cutoff is
 #       reached to call and return the score from my_moves()
 
+from bitboard import BitboardState
+
 # Use the player_id when you call "my_moves()"
 # DO NOT MODIFY THE PLAYER ID
 player_id = 0
@@ -13,7 +15,7 @@ def my_moves(gameState):
     loc = gameState._player_locations[player_id]
     return len(gameState.liberties(loc))
 
-def minimax_decision(gameState, depth):
+def minimax_decision(gameState, depth, bitboard=False):
     """ Return the move along a branch of the game tree that
     has the best possible value.  A move is a pair of coordinates
     in (column, row) order corresponding to a legal move for
@@ -21,7 +23,12 @@ def minimax_decision(gameState, depth):
     
     You can ignore the special case of calling this function
     from a terminal state.
+
+    Set bitboard=True to search a copy-free bitboard.BitboardState copy of
+    the state (gamestate.call_counter does not count its nodes)
     """
+    if bitboard and not isinstance(gameState, BitboardState):
+        gameState = BitboardState.from_state(gameState)
     best_score = float("-inf")
     best_move = None
     for a in gameState.actions():
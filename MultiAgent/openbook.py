@@ -1,33 +1,157 @@
+import math
+import os
 import random
+import struct
 
-from gamestate import GameState
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+from bitboard import BitboardState as GameState
 
 NUM_ROUNDS = 10
+BOOK_DEPTH = 2               # number of plies from the empty board stored in the book
+CONFIDENCE_Z = 1.96          # z-score of the win-rate lower bound used to choose moves
+NUM_PROCS = os.cpu_count() or 1
+
+MAGIC = b"OPENBK2\n"         # header of a book file
+_HEADER = struct.Struct("<BBI")    # xlim, ylim, number of entries
+
+
+def _entry_struct(xlim, ylim):
+    """ Return the struct of a book entry: the board bitboard (one bit per
+    cell, in as many bytes as the board needs), then loc0, loc1, the player
+    and the action (each location as cell index + 1, or 0 for None)
+    """
+    return struct.Struct("<{}sHHBH".format((xlim * ylim + 7) // 8))
+
+
+def build_table(num_rounds=NUM_ROUNDS, depth=BOOK_DEPTH, processes=NUM_PROCS, seed=None,
+                xlim=3, ylim=2):
+    """ Build a table that maps from game state -> action
+
+    The rounds (a random descent to the book depth followed by a random
+    playout) are split between worker processes, their win/visit counters
+    are merged, and the action with the best lower confidence bound on
+    the win rate of the active player is chosen in each state.
 
-def build_table(num_rounds=NUM_ROUNDS):
-    # Builds a table that maps from game state -> action
-    # by choosing the action that accumulates the most
-    # wins for the active player. (Note that this uses
-    # raw win counts, which are a poor statistic to
-    # estimate the value of an action; better statistics
-    # exist.)
-    from collections import defaultdict, Counter
-    book = defaultdict(Counter)
+    Returns
+    -------
+    dict
+        A map from state.hashable to an (x, y) action
+    """
+    return choose_actions(collect_stats(num_rounds, depth, processes, seed, xlim, ylim))
+
+
+def collect_stats(num_rounds=NUM_ROUNDS, depth=BOOK_DEPTH, processes=NUM_PROCS, seed=None,
+                  xlim=3, ylim=2):
+    """ Play the rounds on a pool of worker processes and merge the counters """
+    if seed is None:
+        seed = random.randrange(2**32)
+    processes = max(1, min(processes, num_rounds))
+    jobs = [(num_rounds // processes + (i < num_rounds % processes), depth, seed + i, xlim, ylim)
+            for i in range(processes)]
+    if processes == 1:
+        return _collect(jobs[0])
+    stats = {}
+    with ProcessPoolExecutor(processes) as executor:
+        for worker_stats in executor.map(_collect, jobs):
+            merge_stats(stats, worker_stats)
+    return stats
+
+
+def _collect(job):
+    num_rounds, depth, seed, xlim, ylim = job
+    rng = random.Random(seed)
+    book = defaultdict(lambda: defaultdict(lambda: [0, 0]))
     for _ in range(num_rounds):
-        state = GameState()
-        build_tree(state, book)        
-    return {k: max(v, key=v.get) for k, v in book.items()}
+        build_tree(GameState(xlim, ylim), book, depth, rng)
+    return {k: {a: tuple(c) for a, c in v.items()} for k, v in book.items()}
+
+
+def merge_stats(stats, other):
+    """ Add the (wins, visits) counters of other into stats """
+    for key, actions in other.items():
+        counts = stats.setdefault(key, {})
+        for action, (wins, visits) in actions.items():
+            w, n = counts.get(action, (0, 0))
+            counts[action] = (w + wins, n + visits)
+    return stats
+
 
-def build_tree(state, book, depth=2):
+def lower_bound(wins, visits, z=CONFIDENCE_Z):
+    """ Return the Wilson score lower bound of a win rate """
+    if not visits:
+        return 0.
+    p = wins / visits
+    center = p + z * z / (2 * visits)
+    margin = z * math.sqrt(p * (1 - p) / visits + z * z / (4 * visits * visits))
+    return (center - margin) / (1 + z * z / visits)
+
+
+def choose_actions(stats, z=CONFIDENCE_Z):
+    """ Choose the action with the best win-rate lower bound in every state """
+    return {k: max(v, key=lambda a: lower_bound(*v[a], z=z)) for k, v in stats.items()}
+
+
+def build_tree(state, book, depth=BOOK_DEPTH, rng=random):
     if depth <= 0 or state.terminal_test():
-        return -simulate(state)
-    action = random.choice(state.actions())
-    reward = build_tree(state.result(action), book, depth - 1)
-    book[state.hashable][action] += reward
+        return -simulate(state, rng)
+    action = rng.choice(state.actions())
+    reward = build_tree(state.result(action), book, depth - 1, rng)
+    counts = book[state.hashable][action]
+    counts[0] += reward > 0
+    counts[1] += 1
     return -reward
 
-def simulate(state):
+
+def simulate(state, rng=random):
     player_id = state._parity
     while not state.terminal_test():
-        state = state.result(random.choice(state.actions()))
+        state = state.result(rng.choice(state.actions()))
     return -1 if state.utility(player_id) < 0 else 1
+
+
+def save_book(book, filename, xlim=3, ylim=2):
+    """ Write a book to a compact binary file (one fixed-size entry per state) """
+    if not (0 < xlim <= 255 and 0 < ylim <= 255):
+        raise ValueError("The book file supports boards of up to 255 columns and 255 rows, not {}x{}".format(xlim, ylim))
+    entry = _entry_struct(xlim, ylim)
+    board_bytes = (xlim * ylim + 7) // 8
+
+    def cell(loc):
+        return 0 if loc is None else loc[0] * ylim + loc[1] + 1
+    with open(filename, "wb") as f:
+        f.write(MAGIC + _HEADER.pack(xlim, ylim, len(book)))
+        for (board, locs, player), action in book.items():
+            f.write(entry.pack(board.to_bytes(board_bytes, "little"), cell(locs[0]), cell(locs[1]),
+                               player, cell(action)))
+
+
+def load_book(filename):
+    """ Read a book written by save_book() """
+    with open(filename, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError("{} is not an opening book file".format(filename))
+    xlim, ylim, size = _HEADER.unpack_from(data, len(MAGIC))
+    cells = [None] + [(x, y) for x in range(xlim) for y in range(ylim)]  # indexed by cell + 1
+    entry = _entry_struct(xlim, ylim)
+    offset = len(MAGIC) + _HEADER.size
+    book = {}
+    for board, loc0, loc1, player, action in entry.iter_unpack(data[offset:offset + size * entry.size]):
+        book[(int.from_bytes(board, "little"), (cells[loc0], cells[loc1]), player)] = cells[action]
+    return book
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build an opening book for mini-Isolation.")
+    parser.add_argument('-n', '--rounds', type=int, default=10000, help="Set the number of rounds.")
+    parser.add_argument('-d', '--depth', type=int, default=BOOK_DEPTH, help="Set the book depth in plies.")
+    parser.add_argument('-p', '--processes', type=int, default=NUM_PROCS, help="Set the number of workers.")
+    parser.add_argument('-o', '--output', type=str, default="openbook.bin", help="Set the book file.")
+    args = parser.parse_args()
+
+    book = build_table(args.rounds, args.depth, args.processes)
+    save_book(book, args.output)
+    print("Wrote {} states to {}".format(len(book), args.output))
@@ -0,0 +1,177 @@
+
+# Memoized game-tree solver for mini-Isolation
+
+# minimax_decision() and alpha_beta_search() (see minimax.py & alphabeta.py)
+# with a transposition cache: positions are reached again and again through
+# different move orders, so each position is searched once per depth (and
+# per player) and the value is looked up after that. Alpha-beta values are
+# cached with a flag telling whether they are exact or only a bound,
+# because a cutoff stops the search before the exact value is known.
+
+# The states are converted to bitboard.BitboardState, which is cheap to copy
+# and hashable, and every search reports its own counters in a SearchStats
+# object (instead of the call_counter global in gamestate.py).
+
+from bitboard import BitboardState
+
+EXACT, LOWERBOUND, UPPERBOUND = 0, 1, 2
+
+
+class SearchStats:
+    """
+    Attributes
+    ----------
+    calls: int
+        The number of nodes searched (including the nodes whose value
+        was found in the cache)
+
+    cache_hits: int
+        The number of nodes whose value was found in the cache
+
+    cutoffs: int
+        The number of alpha-beta cutoffs
+    """
+    def __init__(self):
+        self.calls = 0
+        self.cache_hits = 0
+        self.cutoffs = 0
+
+    def __repr__(self):
+        return "SearchStats(calls={}, cache_hits={}, cutoffs={})".format(
+            self.calls, self.cache_hits, self.cutoffs)
+
+
+def liberties_score(state, player_id):
+    """ The number of moves available to the player (see minimax.my_moves) """
+    return len(state.liberties(state._player_locations[player_id]))
+
+
+class Solver:
+    """ Minimax and alpha-beta search with a transposition cache
+
+    The cache is kept between searches, so searching the same game again
+    (or a position later in the same game) reuses the earlier work; call
+    clear() to empty it.
+
+    Parameters
+    ----------
+    score: callable
+        score(state, player_id) returns the heuristic value of a state for
+        the player at the depth limit of a depth-limited search
+
+    Attributes
+    ----------
+    stats: SearchStats
+        The counters of the last search
+    """
+    def __init__(self, score=liberties_score):
+        self.score = score
+        self.cache = {}  # (state key, player id, depth) -> (value, flag)
+        self.stats = SearchStats()
+
+    def clear(self):
+        self.cache.clear()
+
+    def minimax_decision(self, gameState, depth=None):
+        """ Return the move with the best minimax value for the active
+        player, searching the full game tree if depth is None
+        """
+        state, player_id = self._start(gameState)
+        best_score, best_move = float("-inf"), None
+        for action in state.actions():
+            value = self._minimax(state.result(action), player_id, _next(depth))
+            if best_move is None or value > best_score:
+                best_score, best_move = value, action
+        return best_move
+
+    def alpha_beta_search(self, gameState, depth=None):
+        """ Return the move with the best minimax value for the active
+        player using alpha-beta pruning, searching the full game tree if
+        depth is None
+        """
+        state, player_id = self._start(gameState)
+        alpha, beta = float("-inf"), float("inf")
+        best_move = None
+        for action in state.actions():
+            value = self._alpha_beta(state.result(action), player_id, _next(depth), alpha, beta)
+            if best_move is None or value > alpha:
+                alpha, best_move = value, action
+        return best_move
+
+    def solve(self, gameState):
+        """ Return the value of a state for the active player when both
+        players play perfectly (+inf for a win, -inf for a loss)
+        """
+        state, player_id = self._start(gameState)
+        return self._alpha_beta(state, player_id, None, float("-inf"), float("inf"))
+
+    def _start(self, gameState):
+        self.stats = SearchStats()
+        if not isinstance(gameState, BitboardState):
+            gameState = BitboardState.from_state(gameState)
+        return gameState, gameState.player()
+
+    def _minimax(self, state, player_id, depth):
+        self.stats.calls += 1
+        key = (state.hashable, player_id, depth)
+        entry = self.cache.get(key)
+        if entry is not None and entry[1] == EXACT:
+            self.stats.cache_hits += 1
+            return entry[0]
+        if state.terminal_test():
+            value = state.utility(player_id)
+        elif depth is not None and depth <= 0:
+            value = self.score(state, player_id)
+        else:
+            values = [self._minimax(state.result(a), player_id, _next(depth)) for a in state.actions()]
+            value = max(values) if state.player() == player_id else min(values)
+        self.cache[key] = (value, EXACT)
+        return value
+
+    def _alpha_beta(self, state, player_id, depth, alpha, beta):
+        self.stats.calls += 1
+        key = (state.hashable, player_id, depth)
+        entry = self.cache.get(key)
+        if entry is not None:
+            value, flag = entry
+            if (flag == EXACT or (flag == LOWERBOUND and value >= beta)
+                    or (flag == UPPERBOUND and value <= alpha)):
+                self.stats.cache_hits += 1
+                return value
+
+        if state.terminal_test():
+            value = state.utility(player_id)
+            self.cache[key] = (value, EXACT)
+            return value
+        if depth is not None and depth <= 0:
+            value = self.score(state, player_id)
+            self.cache[key] = (value, EXACT)
+            return value
+
+        alpha_orig, beta_orig = alpha, beta
+        maximizing = state.player() == player_id
+        value = float("-inf") if maximizing else float("inf")
+        for action in state.actions():
+            child = self._alpha_beta(state.result(action), player_id, _next(depth), alpha, beta)
+            if maximizing:
+                value = max(value, child)
+                alpha = max(alpha, value)
+            else:
+                value = min(value, child)
+                beta = min(beta, value)
+            if alpha >= beta:
+                self.stats.cutoffs += 1
+                break
+
+        if value <= alpha_orig:
+            flag = UPPERBOUND
+        elif value >= beta_orig:
+            flag = LOWERBOUND
+        else:
+            flag = EXACT
+        self.cache[key] = (value, flag)
+        return value
+
+
+def _next(depth):
+    return None if depth is None else depth - 1
@@ -0,0 +1,42 @@
+
+import copy
+import pickle
+import random
+
+from gamestate import GameState
+from bitboard import BitboardState
+
+# Play random games on several board sizes with both state classes side by
+# side -- the bitboard must agree with the list-of-lists board everywhere
+rng = random.Random(0)
+for xlim, ylim in [(3, 2), (3, 3), (4, 3), (2, 5), (5, 5)]:
+    for _ in range(50):
+        state, bitstate = GameState(xlim, ylim), BitboardState(xlim, ylim)
+        while True:
+            assert state.actions() == bitstate.actions(), "The legal actions should match"
+            assert state.terminal_test() == bitstate.terminal_test(), "The terminal test should match"
+            assert all(state.utility(p) == bitstate.utility(p) for p in (0, 1)), "The utility should match"
+            assert BitboardState.from_state(state) == bitstate, "Equal positions should compare equal"
+            if state.terminal_test(): break
+            action = rng.choice(state.actions())
+            state, bitstate = state.result(action), bitstate.result(action)
+
+empty = BitboardState()
+child = empty.result(empty.actions()[0])
+assert child != empty and empty == BitboardState(), "result() should not modify the state"
+assert hash(child) == hash(empty.result(empty.actions()[0])), "Equal states should hash equally"
+assert isinstance(child.hashable, tuple), "The key should be a tuple"
+try:
+    child._board = 0
+    assert False, "BitboardState should be immutable"
+except AttributeError:
+    pass
+
+# States survive pickle (e.g. sent to a worker process), copy and deepcopy
+for clone in (pickle.loads(pickle.dumps(child)), copy.copy(child), copy.deepcopy(child)):
+    assert clone == child and hash(clone) == hash(child), "A copied state should equal the original"
+    assert clone.actions() == child.actions(), "A copied state should have the same actions"
+clone = pickle.loads(pickle.dumps(BitboardState(4, 3)))
+assert (clone._xlim, clone._ylim) == (4, 3) and clone == BitboardState(4, 3), "The board size should survive pickle"
+
+print("Looks like your bitboard works!")
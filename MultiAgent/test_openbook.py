@@ -1,3 +1,5 @@
+import os
+import tempfile
 
 import openbook
 
@@ -10,4 +12,17 @@ assert all(isinstance(v, tuple) and len(v) == 2 for v in book.values()), \
     "All the values should be tuples of (x, y) actions"
 
 print("Looks like your book worked!")
-print(book)
\ No newline at end of file
+print(book)
+# Books built on several worker processes from the same seed are identical,
+# and survive a round trip through the book file
+book = openbook.build_table(200, processes=2, seed=0)
+assert book == openbook.build_table(200, processes=2, seed=0), "The same seed should build the same book"
+filename = os.path.join(tempfile.mkdtemp(), "openbook.bin")
+openbook.save_book(book, filename)
+assert openbook.load_book(filename) == book, "The saved book should load unchanged"
+
+# The board field grows with the board, so larger boards fit in the book file
+big_book = openbook.build_table(20, processes=1, seed=0, xlim=11, ylim=9)
+openbook.save_book(big_book, filename, xlim=11, ylim=9)
+assert openbook.load_book(filename) == big_book, "A book for a large board should load unchanged"
+print("Looks like your book file worked!")
@@ -0,0 +1,41 @@
+
+from bitboard import BitboardState
+from gamestate import GameState
+from solver import Solver
+
+
+def minimax_value(state, player_id):
+    """ Plain (uncached) minimax value used as a reference """
+    if state.terminal_test(): return state.utility(player_id)
+    values = [minimax_value(state.result(a), player_id) for a in state.actions()]
+    return max(values) if state.player() == player_id else min(values)
+
+
+# Both cached searches must choose a move with the minimax value of the
+# empty board, and the solver must agree with plain minimax
+for xlim, ylim in [(3, 2), (3, 3), (2, 4)]:
+    state = BitboardState(xlim, ylim)
+    value = minimax_value(state, 0)
+    solver = Solver()
+    assert solver.solve(state) == value, "The solved value should match minimax"
+    for search in (solver.minimax_decision, solver.alpha_beta_search):
+        action = search(state)
+        assert minimax_value(state.result(action), 0) == value, "The move should be optimal"
+    assert solver.stats.calls > 0, "The search should count its nodes"
+
+# The search stats count the nodes of the bitboard search, like the
+# call_counter of gamestate.py does for testcode2.py (5 nodes at depth 1)
+solver = Solver()
+solver.minimax_decision(BitboardState(), 1)
+assert solver.stats.calls == 5, "Minimax should visit the 5 open spaces at depth 1"
+
+# Searching again with a warm cache only visits the root's children
+solver = Solver()
+solver.alpha_beta_search(GameState())
+solver.alpha_beta_search(GameState())
+assert solver.stats.cache_hits == solver.stats.calls, "The second search should be answered by the cache"
+
+# Larger boards can be solved completely
+solver = Solver()
+print("4x3 board value: {}, {}".format(solver.solve(BitboardState(4, 3)), solver.stats))
+print("Looks like your solver works!")
@@ -0,0 +1,175 @@
+class CompiledPlanningGraph:
+    """ Planning graph heuristics over precompiled int bitsets
+
+    PlanningGraph builds new layers of ActionNode and Expr objects for every
+    state it evaluates, but the literals, the actions (including the no-ops)
+    and the static mutexes of a problem never change. This class compiles
+    them into bitmasks once per problem, so that each state evaluation is a
+    relaxed reachability pass over plain ints:
+
+        literals    fluent i of problem.state_map is bit i, and its negation
+                    is bit n + i (n = len(problem.state_map))
+        actions     the no-op of literal j is action j; the problem actions
+                    follow in the order of problem.actions_list
+
+    The heuristics return the same values as the PlanningGraph heuristics
+    (with serialized actions) for the same state.
+
+    Parameters
+    ----------
+    problem : BasePlanningProblem
+        The planning problem (its actions_list must be complete)
+    """
+    def __init__(self, problem):
+        state_map = problem.state_map
+        n = self._n = len(state_map)
+        index = {fluent: i for i, fluent in enumerate(state_map)}
+        self._full = (1 << 2 * n) - 1
+
+        def literal_bits(positive, negative):
+            return (sum(1 << index[f] for f in set(positive))
+                    | sum(1 << (n + index[f]) for f in set(negative)))
+
+        no_ops = [1 << j for j in range(2 * n)]
+        actions = problem.actions_list
+        self._preconditions = no_ops + [literal_bits(a.precond_pos, a.precond_neg) for a in actions]
+        self._effects = no_ops + [literal_bits(a.effect_add, a.effect_rem) for a in actions]
+        self._real_actions = ((1 << len(actions)) - 1) << 2 * n
+
+        positive = [g for g in problem.goal if g.op != '~']
+        negative = [g.args[0] for g in problem.goal if g.op == '~']
+        self._goal = literal_bits(positive, negative)
+        self._goals = list(self._bits(self._goal))
+
+        self._static_mutexes = None  # computed on the first call to h_setlevel()
+
+    def _negate(self, literals):
+        """ Return the negations of a bitmask of literals """
+        n = self._n
+        return ((literals >> n) | (literals << n)) & self._full
+
+    def _state_literals(self, state):
+        n = self._n
+        return sum(1 << (i if f else n + i) for i, f in enumerate(state))
+
+    @staticmethod
+    def _bits(mask):
+        """ Yield the index of every bit set in a mask """
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def level_costs(self, state):
+        """ Return the level cost of every goal literal in the state (see
+        PlanningGraph.h_levelsum), ignoring all mutexes
+
+        Returns
+        -------
+        list
+            The level cost of each goal literal (infinite if it is unreachable)
+        """
+        literals = self._state_literals(state)
+        pending = list(zip(self._preconditions[2 * self._n:], self._effects[2 * self._n:]))
+        costs = {}
+        level = 0
+        while True:
+            for goal in self._goals:
+                if goal not in costs and literals >> goal & 1:
+                    costs[goal] = level
+            if len(costs) == len(self._goals):
+                return list(costs.values())
+            # literals persist through the no-ops, and each action only needs to be applied once
+            reached, waiting = literals, []
+            for action in pending:
+                if action[0] & literals == action[0]:
+                    reached |= action[1]
+                else:
+                    waiting.append(action)
+            if reached == literals:
+                return list(costs.values()) + [float("inf")] * (len(self._goals) - len(costs))
+            literals, pending = reached, waiting
+            level += 1
+
+    def h_levelsum(self, state):
+        return sum(self.level_costs(state))
+
+    def h_maxlevel(self, state):
+        return max(self.level_costs(state))
+
+    def h_setlevel(self, state):
+        """ Return the first level where all goal literals appear and no pair
+        of them is mutex, with serialized actions (see PlanningGraph.h_setlevel)
+        """
+        if self._static_mutexes is None:
+            self._compile_mutexes()
+        literals = self._state_literals(state)
+        literal_mutexes = {j: self._negate(1 << j) & literals for j in self._bits(literals)}
+        level = 0
+        while True:
+            if (self._goal & literals == self._goal
+                    and not any(literal_mutexes[g] & self._goal for g in self._goals)):
+                return level
+            actions = [a for a, p in enumerate(self._preconditions) if p & literals == p]
+            action_mask = sum(1 << a for a in actions)
+            action_mutexes = self._action_mutexes(actions, action_mask, literal_mutexes)
+            next_literals, next_mutexes = self._literal_mutexes(actions, action_mask, action_mutexes)
+            if next_literals == literals and next_mutexes == literal_mutexes:
+                return float("inf")  # the graph leveled off
+            literals, literal_mutexes = next_literals, next_mutexes
+            level += 1
+
+    def _compile_mutexes(self):
+        """ Find the actions that produce & consume each literal, and the
+        static (serial, inconsistent effects & interference) action mutexes
+        """
+        num_literals = 2 * self._n
+        producers, consumers = [0] * num_literals, [0] * num_literals
+        for a, (pre, eff) in enumerate(zip(self._preconditions, self._effects)):
+            for j in self._bits(pre): consumers[j] |= 1 << a
+            for j in self._bits(eff): producers[j] |= 1 << a
+        self._producers, self._consumers = producers, consumers
+
+        self._static_mutexes = []
+        for a, (pre, eff) in enumerate(zip(self._preconditions, self._effects)):
+            mutexes = self._real_actions if a >= num_literals else 0
+            for j in self._bits(self._negate(eff)):
+                mutexes |= producers[j] | consumers[j]
+            for j in self._bits(self._negate(pre)):
+                mutexes |= producers[j]
+            self._static_mutexes.append(mutexes & ~(1 << a))
+
+    def _action_mutexes(self, actions, action_mask, literal_mutexes):
+        # competing needs: the actions with a precondition that is mutex with literal j
+        needs = {}
+        for j, mutexes in literal_mutexes.items():
+            if mutexes:
+                needs[j] = 0
+                for k in self._bits(mutexes):
+                    needs[j] |= self._consumers[k]
+        action_mutexes = {}
+        for a in actions:
+            mutexes = self._static_mutexes[a]
+            for j in self._bits(self._preconditions[a]):
+                mutexes |= needs.get(j, 0)
+            action_mutexes[a] = mutexes & action_mask & ~(1 << a)
+        return action_mutexes
+
+    def _literal_mutexes(self, actions, action_mask, action_mutexes):
+        literals = 0
+        # supported[a]: the literals produced by an action that is not mutex with action a
+        supported = {}
+        for a in actions:
+            literals |= self._effects[a]
+            effects = 0
+            for b in self._bits(action_mask & ~action_mutexes[a]):
+                effects |= self._effects[b]
+            supported[a] = effects
+        # inconsistent support: literals that no pair of non-mutex actions can produce together
+        literal_mutexes = {}
+        for j in self._bits(literals):
+            compatible = 0
+            for a in self._bits(self._producers[j] & action_mask):
+                compatible |= supported[a]
+            literal_mutexes[j] = (literals & ~compatible) | (self._negate(1 << j) & literals)
+        return literals, literal_mutexes
@@ -1,8 +1,8 @@
 
 from copy import deepcopy
 from functools import lru_cache
-from itertools import combinations
-from collections import defaultdict, MutableSet
+from collections import defaultdict
+from collections.abc import MutableSet
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
@@ -12,6 +12,59 @@ from aimacode.utils import expr, Expr
     ##############################################################################
 
 
+class BitIndex:
+    """ Index of the literals and actions of a planning graph in its bitsets
+
+    Every item gets a distinct bit the first time it is seen, and the same
+    bit is used in every layer of the planning graph, so that sets of items
+    can be stored as int bitmasks and combined with bitwise operators. Each
+    planning graph has its own index (see BaseLayer.bit_index).
+    """
+    def __init__(self):
+        self._bits = {}
+        self._items = []
+        self._negation_bits = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def bit(self, item):
+        """ Return the bitmask of a literal or action """
+        mask = self._bits.get(item)
+        if mask is None:
+            mask = self._bits[item] = 1 << len(self._items)
+            self._items.append(item)
+        return mask
+
+    def bits(self, items):
+        """ Return the bitmask of a collection of literals or actions """
+        mask = 0
+        for item in items:
+            mask |= self.bit(item)
+        return mask
+
+    def negation_bit(self, literal):
+        """ Return the bitmask of the logical negation of a literal """
+        mask = self._negation_bits.get(literal)
+        if mask is None:
+            mask = self._negation_bits[literal] = self.bit(~literal)
+        return mask
+
+    def negation_bits(self, literals):
+        """ Return the bitmask of the negations of a collection of literals """
+        mask = 0
+        for literal in literals:
+            mask |= self.negation_bit(literal)
+        return mask
+
+    def items(self, mask):
+        """ Yield the literal or action of every bit set in a bitmask """
+        while mask:
+            low = mask & -mask
+            yield self._items[low.bit_length() - 1]
+            mask ^= low
+
+
 @lru_cache()
 def make_node(action, no_op=False):
     """ Convert Action objects to planning graph nodes by creating distinct
@@ -92,23 +145,34 @@ class BaseLayer(MutableSet):
         parents[actionA] is a set containing the symbolic literals (positive AND
         negative) that are preconditions of the action.
 
+    parent_bits : dict
+        Mapping from each item to the bitmask (see BitIndex) of its parents
+
     children : dict
         Mapping from each item (action or literal) in the current layer to the
         symbolic node(s) in the child layer of the planning graph. E.g.,
         children[actionA] is a set containing the symbolic literals (positive AND
         negative) that are set by performing actionA.
 
+    child_bits : dict
+        Mapping from each item to the bitmask (see BitIndex) of its children
+
     parent_layer : BaseLayer (or subclass)
         Contains a reference to the layer preceding this one in the planning graph;
         the root literal layer of a planning graph contains an empty ActionLayer as
         parent. (This ensures that parent_layer.is_mutex() is always defined for
         real layers in the planning graph) Action layers always have a literal layer
         as parent, and literal layers always have an action layer as parent.
+
+    bit_index : BitIndex
+        The bits of the literals and actions in the bitmasks of the layer, shared
+        with the parent layer (a layer without a parent starts a new index)
     
     _mutexes : dict
-        Mapping from each item (action or literal) to a set containing all items
-        that are mutex to the key. E.g., _mutexes[literaA] is a set of literals
-        that are mutex to literalA in this level of the planning graph
+        Mapping from each item (action or literal) to a bitmask (see BitIndex) of
+        all items that are mutex to the key. E.g., _mutexes[literaA] has a bit
+        set for each literal that is mutex to literalA in this level of the
+        planning graph
 
     _ignore_mutexes : bool
         If _ignore_mutexes is True then _dynamic_ mutexes will be ignored (static
@@ -132,8 +196,11 @@ class BaseLayer(MutableSet):
         self.__store = set(iter(items))
         self.parents = defaultdict(set)
         self.children = defaultdict(set)
-        self._mutexes = defaultdict(set)
+        self.parent_bits = defaultdict(int)
+        self.child_bits = defaultdict(int)
+        self._mutexes = defaultdict(int)
         self.parent_layer = parent_layer
+        self.bit_index = BitIndex() if parent_layer is None else parent_layer.bit_index
         self._ignore_mutexes = ignore_mutexes
 
     def __contains__(self, item):
@@ -159,65 +226,134 @@ class BaseLayer(MutableSet):
         except ValueError:
             pass
 
+    def _copy_edges(self, layer):
+        self.parents.update({k: set(v) for k, v in layer.parents.items()})
+        self.children.update({k: set(v) for k, v in layer.children.items()})
+        self.parent_bits.update(layer.parent_bits)
+        self.child_bits.update(layer.child_bits)
+
     def set_mutex(self, itemA, itemB):
-        self._mutexes[itemA].add(itemB)
-        self._mutexes[itemB].add(itemA)
+        self._mutexes[itemA] |= self.bit_index.bit(itemB)
+        self._mutexes[itemB] |= self.bit_index.bit(itemA)
 
     def is_mutex(self, itemA, itemB):
-        return itemA in self._mutexes.get(itemB, [])
+        return bool(self._mutexes.get(itemB, 0) & self.bit_index.bit(itemA))
 
 
 class BaseActionLayer(BaseLayer):
     def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False):
         super().__init__(actions, parent_layer, ignore_mutexes)
         self._serialize=serialize
+        # bitmasks of the negations of the preconditions & effects of each action
+        self.parent_negations = defaultdict(int)
+        self.child_negations = defaultdict(int)
         if isinstance(actions, BaseActionLayer):
-            self.parents.update({k: set(v) for k, v in actions.parents.items()})
-            self.children.update({k: set(v) for k, v in actions.children.items()})
+            self._copy_edges(actions)
+            self.parent_negations.update(actions.parent_negations)
+            self.child_negations.update(actions.child_negations)
 
     def update_mutexes(self):
-        for actionA, actionB in combinations(iter(self), 2):
-            if self._serialize and actionA.no_op == actionB.no_op == False:
-                self.set_mutex(actionA, actionB)
-            elif (self._inconsistent_effects(actionA, actionB)
-                    or self._interference(actionA, actionB)):
-                self.set_mutex(actionA, actionB)
-            elif self._ignore_mutexes:
-                continue
-            elif self._competing_needs(actionA, actionB):
-                self.set_mutex(actionA, actionB)
+        """ Set the mutexes of every action with bitwise operations on the
+        masks of the layer, instead of testing every pair of actions: the
+        actions mutex to an action are the ones that produce or consume the
+        negations of its effects (inconsistent effects & interference), that
+        produce the negations of its preconditions (interference), or that
+        consume a literal mutex to one of its preconditions (competing needs)
+        """
+        index = self.bit_index
+        action_mask, real_actions = 0, 0
+        producers, consumers = defaultdict(int), defaultdict(int)
+        for action in self:
+            action_bit = index.bit(action)
+            action_mask |= action_bit
+            if not action.no_op:
+                real_actions |= action_bit
+            for literal in self.children[action]:
+                producers[literal] |= action_bit
+            for literal in self.parents[action]:
+                consumers[literal] |= action_bit
+
+        # needs[literal]: the actions with a precondition that is mutex to the literal
+        literal_mutexes = self.parent_layer._mutexes if self.parent_layer is not None else {}
+        needs = {}
+        for action in self:
+            action_bit = index.bit(action)
+            mutexes = real_actions if self._serialize and not action.no_op else 0
+            for literal in index.items(self.child_negations[action]):
+                mutexes |= producers.get(literal, 0) | consumers.get(literal, 0)
+            for literal in index.items(self.parent_negations[action]):
+                mutexes |= producers.get(literal, 0)
+            if not self._ignore_mutexes:
+                for literal in self.parents[action]:
+                    if literal not in needs:
+                        needs[literal] = 0
+                        for other in index.items(literal_mutexes.get(literal, 0)):
+                            needs[literal] |= consumers.get(other, 0)
+                    mutexes |= needs[literal]
+            mutexes &= action_mask & ~action_bit
+            if mutexes:
+                self._mutexes[action] |= mutexes
 
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
         self.parents[action] |= set(literals)
+        self.parent_bits[action] |= self.bit_index.bits(literals)
+        self.parent_negations[action] |= self.bit_index.negation_bits(literals)
 
     def add_outbound_edges(self, action, literals):
         # outbound action edges are one-to-many
         self.children[action] |= set(literals)
+        self.child_bits[action] |= self.bit_index.bits(literals)
+        self.child_negations[action] |= self.bit_index.negation_bits(literals)
 
 
 class BaseLiteralLayer(BaseLayer):
     def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False):
         super().__init__(literals, parent_layer, ignore_mutexes)
         if isinstance(literals, BaseLiteralLayer):
-            self.parents.update({k: set(v) for k, v in literals.parents.items()})
-            self.children.update({k: set(v) for k, v in literals.children.items()})
+            self._copy_edges(literals)
 
     def update_mutexes(self):
-        for literalA, literalB in combinations(iter(self), 2):
-            if self._negation(literalA, literalB):
-                self.set_mutex(literalA, literalB)
-            elif self._ignore_mutexes:
-                continue
-            elif len(self.parent_layer) and self._inconsistent_support(literalA, literalB):
-                self.set_mutex(literalA, literalB)
+        """ Set the mutexes of every literal with bitwise operations on the
+        masks of the layer, instead of testing every pair of literals: a
+        literal is mutex to its negation, and to every literal that is not
+        produced by any action that is not mutex to one of its supporting
+        actions in the parent layer (inconsistent support)
+        """
+        index = self.bit_index
+        literal_mask = index.bits(self)
+        parent_actions = self.parent_layer
+        check_support = not self._ignore_mutexes and parent_actions is not None and len(parent_actions)
+        if check_support:
+            action_mask = index.bits(parent_actions)
+            action_mutexes = parent_actions._mutexes
+            action_effects = parent_actions.child_bits
+        for literal in self:
+            literal_bit = index.bit(literal)
+            mutexes = index.negation_bit(literal)
+            if check_support:
+                # the actions compatible with at least one of the supporting actions
+                compatible_actions = 0
+                for action in self.parents[literal]:
+                    compatible_actions |= action_mask & ~action_mutexes.get(action, 0)
+                compatible = 0
+                for action in index.items(compatible_actions):
+                    compatible |= action_effects.get(action, 0)
+                mutexes |= ~compatible
+            mutexes &= literal_mask & ~literal_bit
+            if mutexes:
+                self._mutexes[literal] |= mutexes
 
     def add_inbound_edges(self, action, literals):
         # inbound literal edges are many-to-many
+        action_bit = self.bit_index.bit(action)
         for literal in literals:
             self.parents[literal].add(action)
+            self.parent_bits[literal] |= action_bit
 
     def add_outbound_edges(self, action, literals):
         # outbound literal edges are many-to-many
+        action_bit = self.bit_index.bit(action)
         for literal in literals:
             self.children[literal].add(action)
+            self.child_bits[literal] |= action_bit
@@ -19,8 +19,7 @@ class ActionLayer(BaseActionLayer):
         --------
         layers.ActionNode
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        return bool(self.child_bits[actionA] & self.child_negations[actionB])
 
 
     def _interference(self, actionA, actionB):
@@ -34,8 +33,8 @@ class ActionLayer(BaseActionLayer):
         --------
         layers.ActionNode
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        return bool(self.child_bits[actionA] & self.parent_negations[actionB]
+                    or self.child_bits[actionB] & self.parent_negations[actionA])
 
     def _competing_needs(self, actionA, actionB):
         """ Return True if any preconditions of the two actions are pairwise mutex in the parent layer
@@ -49,8 +48,9 @@ class ActionLayer(BaseActionLayer):
         layers.ActionNode
         layers.BaseLayer.parent_layer
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        mutexes = self.parent_layer._mutexes
+        needs = self.parent_bits[actionB]
+        return any(mutexes.get(literal, 0) & needs for literal in self.parents[actionA])
 
 
 class LiteralLayer(BaseLiteralLayer):
@@ -66,13 +66,13 @@ class LiteralLayer(BaseLiteralLayer):
         --------
         layers.BaseLayer.parent_layer
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        mutexes = self.parent_layer._mutexes
+        support = self.parent_bits[literalB]
+        return not any(support & ~mutexes.get(action, 0) for action in self.parents[literalA])
 
     def _negation(self, literalA, literalB):
         """ Return True if two literals are negations of each other """
-        # TODO: implement this function
-        raise NotImplementedError
+        return self.bit_index.negation_bit(literalA) == self.bit_index.bit(literalB)
 
 
 class PlanningGraph:
@@ -107,6 +107,7 @@ class PlanningGraph:
         literals = [s if f else ~s for f, s in zip(state, problem.state_map)]
         layer = LiteralLayer(literals, ActionLayer(), self._ignore_mutexes)
         layer.update_mutexes()
+        self.bit_index = layer.bit_index  # shared by every layer of the graph
         self.literal_layers = [layer]
         self.action_layers = []
 
@@ -135,8 +136,7 @@ class PlanningGraph:
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        # TODO: implement this function
-        raise NotImplementedError
+        return sum(self._level_costs().values())
 
     def h_maxlevel(self):
         """ Calculate the max level heuristic for the planning graph
@@ -165,8 +165,7 @@ class PlanningGraph:
         -----
         WARNING: you should expect long runtimes using this heuristic with A*
         """
-        # TODO: implement maxlevel heuristic
-        raise NotImplementedError
+        return max(self._level_costs().values())
 
     def h_setlevel(self):
         """ Calculate the set level heuristic for the planning graph
@@ -190,8 +189,36 @@ class PlanningGraph:
         -----
         WARNING: you should expect long runtimes using this heuristic on complex problems
         """
-        # TODO: implement setlevel heuristic
-        raise NotImplementedError
+        goal_bits = self.bit_index.bits(self.goal)
+        level = 0
+        while True:
+            layer = self.literal_layers[-1]
+            if self.goal <= layer and not any(layer._mutexes.get(goal, 0) & goal_bits for goal in self.goal):
+                return level
+            if self._is_leveled:
+                return float("inf")
+            self._extend()
+            level += 1
+
+    def _level_costs(self):
+        """ Return the level cost of every goal literal, extending the graph
+        one level at a time until every goal has appeared (the cost of goals
+        that never appear is infinite)
+        """
+        costs = {}
+        level = 0
+        while True:
+            layer = self.literal_layers[-1]
+            for goal in self.goal:
+                if goal not in costs and goal in layer:
+                    costs[goal] = level
+            if len(costs) == len(self.goal):
+                return costs
+            if self._is_leveled:
+                costs.update((goal, float("inf")) for goal in self.goal if goal not in costs)
+                return costs
+            self._extend()
+            level += 1
 
     ##############################################################################
     #                     DO NOT MODIFY CODE BELOW THIS LINE                     #
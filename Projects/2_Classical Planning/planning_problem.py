@@ -5,7 +5,7 @@ from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
 from _utils import encode_state, decode_state
-from my_planning_graph import PlanningGraph
+from compiled_graph import CompiledPlanningGraph
 
     ##############################################################################
     #                 YOU DO NOT NEED TO MODIFY CODE IN THIS FILE                #
@@ -16,8 +16,19 @@ class BasePlanningProblem(Problem):
     def __init__(self, initial, goal):
         self.state_map = sorted(initial.pos + initial.neg, key=str)
         self.initial_state_TF = encode_state(initial, self.state_map)
+        self._planning_graph = None
         super().__init__(self.initial_state_TF, goal=goal)
 
+    @property
+    def planning_graph(self):
+        """ The CompiledPlanningGraph of the problem, which is built on first
+        use (after the subclass has set actions_list) and shared by all of the
+        planning graph heuristics
+        """
+        if self._planning_graph is None:
+            self._planning_graph = CompiledPlanningGraph(self)
+        return self._planning_graph
+
     @lru_cache()
     def h_unmet_goals(self, node):
         """ This heuristic estimates the minimum number of actions that must be
@@ -38,9 +49,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
-        score = pg.h_levelsum()
-        return score
+        return self.planning_graph.h_levelsum(node.state)
 
     @lru_cache()
     def h_pg_maxlevel(self, node):
@@ -53,9 +62,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
-        score = pg.h_maxlevel()
-        return score
+        return self.planning_graph.h_maxlevel(node.state)
 
     @lru_cache()
     def h_pg_setlevel(self, node):
@@ -67,9 +74,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True)
-        score = pg.h_setlevel()
-        return score
+        return self.planning_graph.h_setlevel(node.state)
 
     def actions(self, state):
         """ Return the actions that can be executed in the given state. """
@@ -0,0 +1,35 @@
+
+import unittest
+
+from random import Random
+
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from example_have_cake import have_cake
+from my_planning_graph import PlanningGraph
+
+
+class CompiledPlanningGraphTest(unittest.TestCase):
+    def _random_states(self, problem, seed, num_walks=3, num_steps=8):
+        rng = Random(seed)
+        for _ in range(num_walks):
+            state = problem.initial
+            for _ in range(num_steps):
+                yield state
+                actions = problem.actions(state)
+                if not actions: break
+                state = problem.result(state, rng.choice(actions))
+
+    def test_heuristics_match_planning_graph(self):
+        """ the compiled heuristics equal the PlanningGraph heuristics on random states """
+        for problem in (have_cake(), air_cargo_p1(), air_cargo_p2()):
+            graph = problem.planning_graph
+            for state in self._random_states(problem, 0):
+                self.assertEqual(graph.h_levelsum(state),
+                                 PlanningGraph(problem, state, ignore_mutexes=True).h_levelsum())
+                self.assertEqual(graph.h_maxlevel(state),
+                                 PlanningGraph(problem, state, ignore_mutexes=True).h_maxlevel())
+                self.assertEqual(graph.h_setlevel(state), PlanningGraph(problem, state).h_setlevel())
+
+
+if __name__ == '__main__':
+    unittest.main()
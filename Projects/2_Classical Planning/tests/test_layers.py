@@ -0,0 +1,84 @@
+import unittest
+
+from itertools import combinations
+
+from aimacode.utils import expr
+from air_cargo_problems import air_cargo_p1
+from example_have_cake import have_cake
+from layers import BitIndex
+from my_planning_graph import PlanningGraph
+
+
+class BitIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = BitIndex()
+        self.X, self.Y = expr('FakeFluent_X'), expr('FakeFluent_Y')
+
+    def test_bit(self):
+        """ every item gets a distinct bit that does not change """
+        x, y = self.index.bit(self.X), self.index.bit(self.Y)
+        self.assertEqual((x, y), (1, 2))
+        self.assertEqual(self.index.bit(self.X), x)
+        self.assertEqual(len(self.index), 2)
+
+    def test_indexes_are_independent(self):
+        """ each index numbers its own items from the first bit """
+        self.index.bit(self.X)
+        other = BitIndex()
+        self.assertEqual(other.bit(self.Y), 1)
+        self.assertEqual(len(other), 1)
+
+    def test_bits(self):
+        """ the mask of a collection combines the bits of its items """
+        mask = self.index.bits([self.X, self.Y, self.X])
+        self.assertEqual(mask, self.index.bit(self.X) | self.index.bit(self.Y))
+        self.assertEqual(self.index.bits([]), 0)
+
+    def test_negation_bits(self):
+        """ the negation of a literal has its own bit """
+        mask = self.index.negation_bits([self.X, self.Y])
+        self.assertEqual(self.index.negation_bit(self.X), self.index.bit(~self.X))
+        self.assertEqual(mask, self.index.bits([~self.X, ~self.Y]))
+        self.assertFalse(mask & self.index.bits([self.X, self.Y]))
+
+    def test_items(self):
+        """ items() maps a mask back to its items """
+        mask = self.index.bits([self.Y, ~self.X])
+        self.assertEqual(set(self.index.items(mask)), {self.Y, ~self.X})
+        self.assertEqual(list(self.index.items(0)), [])
+
+
+class UpdateMutexesTest(unittest.TestCase):
+    def _assert_pairwise(self, graph):
+        for layer in graph.action_layers:
+            for actionA, actionB in combinations(layer, 2):
+                mutex = ((layer._serialize and not actionA.no_op and not actionB.no_op)
+                         or layer._inconsistent_effects(actionA, actionB)
+                         or layer._interference(actionA, actionB)
+                         or (not layer._ignore_mutexes and layer._competing_needs(actionA, actionB)))
+                self.assertEqual(layer.is_mutex(actionA, actionB), mutex, (actionA, actionB))
+                self.assertEqual(layer.is_mutex(actionB, actionA), mutex, (actionA, actionB))
+        for layer in graph.literal_layers:
+            for literalA, literalB in combinations(layer, 2):
+                mutex = (layer._negation(literalA, literalB)
+                         or (not layer._ignore_mutexes and len(layer.parent_layer) > 0
+                             and layer._inconsistent_support(literalA, literalB)))
+                self.assertEqual(layer.is_mutex(literalA, literalB), mutex, (literalA, literalB))
+
+    def test_masks_match_pairwise_tests(self):
+        """ the mutex masks agree with the pairwise mutex tests in every layer """
+        for problem in (have_cake(), air_cargo_p1()):
+            for serialize, ignore_mutexes in ((True, False), (False, False), (True, True)):
+                self._assert_pairwise(PlanningGraph(problem, problem.initial, serialize, ignore_mutexes).fill())
+
+    def test_layers_share_the_graph_index(self):
+        """ every layer of a graph uses the same index, and graphs do not share one """
+        problem = have_cake()
+        graph = PlanningGraph(problem, problem.initial).fill()
+        layers = graph.literal_layers + graph.action_layers
+        self.assertTrue(all(layer.bit_index is graph.bit_index for layer in layers))
+        self.assertIsNot(PlanningGraph(problem, problem.initial).bit_index, graph.bit_index)
+
+
+if __name__ == '__main__':
+    unittest.main()